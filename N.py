@@ -1,20 +1,44 @@
+import time
+startup_clock = time.perf_counter()
+startup_cpu = time.process_time()
 import ply
 import ply.lex as lex
 import ply.yacc as yacc
 import math
 import random
 import sys
-import hashlib
-import time
-import base64
 import os
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from urllib import parse, request
-import json
-import asyncio
-from collections import defaultdict
+import pprint
+import re
+import zlib
+import marshal
+import keyword
+import builtins
+import importlib.util
+from collections import defaultdict, OrderedDict
 from functools import lru_cache
 
+startup_marks = [('imports', time.perf_counter())]
+
+def startup_mark(label):
+    if startup_marks[-1][0] != 'done':
+        startup_marks.append((label, time.perf_counter()))
+
+def print_startup_profile(out=sys.stderr):
+    if startup_marks[-1][0] == 'done':
+        return
+    out.write(f"{'python':<12} {startup_cpu * 1000:8.2f} ms cpu (interpreter start, compiling N.py)\n")
+    previous = startup_clock
+    waited = 0
+    for label, moment in startup_marks:
+        out.write(f"{label:<12} {(moment - previous) * 1000:8.2f} ms\n")
+        if label == 'input':
+            waited = moment - previous
+        previous = moment
+    out.write(f"{'total':<12} {(previous - startup_clock - waited) * 1000:8.2f} ms (after python, excluding input)\n")
+    out.write(f"tables: {'prebuilt' if prebuilt_tables() else 'generated in memory'}\n")
+    startup_marks.append(('done', None))
+
 
 version = "1.4.0-beta"
 # === Symbol Table ===
@@ -80,16 +104,44 @@ symbol_table = {
 vars = {}  
 scope_stack = [{}] 
 consts = {}  
-mod_vars = defaultdict(dict)
 rvars = defaultdict(dict)
-mod_funcs = defaultdict(dict)  
-vars_stack = [] 
+modules = {}
+script_args = []
 funcs = {}  
 
 class Error(Exception):
     pass
 
-varCache = {}
+class VarCache:
+    __slots__ = ('entries', 'hits', 'misses')
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, name):
+        entry = self.entries.get(name)
+        if entry is not None:
+            scope, position = entry
+            if position < len(scope_stack) and scope_stack[position] is scope and name in scope:
+                self.hits += 1
+                return scope
+        self.misses += 1
+        for position in range(len(scope_stack) - 1, -1, -1):
+            scope = scope_stack[position]
+            if name in scope:
+                self.entries[name] = (scope, position)
+                return scope
+        return None
+
+    def invalidate(self, name):
+        self.entries.pop(name, None)
+
+    def clear(self):
+        self.entries.clear()
+
+varCache = VarCache()
 
 def enter_scope():
     scope_stack.append({})
@@ -97,26 +149,58 @@ def enter_scope():
 def exit_scope():
     if len(scope_stack) > 1:
         scope_stack.pop()
-        varCache.clear()
+
+def runtime_stats():
+    stats = {
+        'var_cache_hits': varCache.hits,
+        'var_cache_misses': varCache.misses,
+    }
+    if ast_cache['hits'] or ast_cache['misses']:
+        stats['ast_cache_hits'] = ast_cache['hits']
+        stats['ast_cache_misses'] = ast_cache['misses']
+    for table in memo_tables:
+        stats[f'memo_hits[{table.name}]'] = table.hits
+        stats[f'memo_misses[{table.name}]'] = table.misses
+    sites = {}
+    for site in call_sites:
+        if site.hits or site.misses:
+            counts = sites.setdefault(site.name, [0, 0])
+            counts[0] += site.hits
+            counts[1] += site.misses
+    for name, (hits, misses) in sites.items():
+        stats[f'call_site_hits[{name}]'] = hits
+        stats[f'call_site_misses[{name}]'] = misses
+        stats[f'call_site_hit_rate[{name}]'] = f"{hits / (hits + misses):.1%}"
+    return stats
+
+def print_runtime_stats():
+    for key, value in runtime_stats().items():
+        print(f"{key}: {value}")
+
+def bind_local(name, value):
+    scope_stack[-1][name] = value
+    varCache.invalidate(name)
 
 def find_variable(name):
-    if name in varCache:
-        return varCache[name]
-    for scope in reversed(scope_stack):
-        if name in scope:
-            varCache[name] = scope[name]
-            return scope[name]
+    scope = varCache.lookup(name)
+    if scope is not None:
+        return scope[name]
     if name in vars:
-        varCache[name] = vars[name]
         return vars[name]
     if name in consts:
-        varCache[name] = consts[name]
         return consts[name]
     if name in rvars:
-        varCache[name] = rvars[name]
         return rvars[name]
     raise NameError(f"Variable '{name}' not defined in current scope")
 
+def is_function_name(name):
+    return name in funcs or symbol_table.get(name) == 'function'
+
+def lookup_name(name):
+    if name in funcs or symbol_table.get(name) == 'function':
+        return 'function'
+    return find_variable(name)
+
 # @lru_cache(maxsize=1024)
 def update_variable(name, value, is_const=False):
     if name in rvars:
@@ -133,7 +217,7 @@ def update_variable(name, value, is_const=False):
                 scope[name] = value
                 break
     else:
-        scope_stack[-1][name] = value
+        bind_local(name, value)
         if is_const:
             consts[name] = value
 
@@ -153,13 +237,72 @@ def cotan_deg(x):
 def symbol_lookup(identifier):
     return symbol_table.get(identifier, 'unknown')
 
+# === Parser Tables ===
+table_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+table_state = {}
+
+def grammar_signature():
+    with open(os.path.abspath(__file__), encoding='utf-8') as f:
+        source = f.read()
+    grammar = source[source.index('\n# === Lexer ===\n'):source.index('\n# === Fast Parser ===\n')]
+    return f"{zlib.crc32(grammar.encode()):08x}-{len(grammar)}"
+
+def load_table(name):
+    path = os.path.join(table_dir, name + '.py')
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def prebuilt_tables():
+    if 'tables' not in table_state:
+        tables = None
+        try:
+            with open(os.path.join(table_dir, 'signature'), encoding='utf-8') as f:
+                if f.read().strip() == grammar_signature():
+                    picklefile = os.path.join(table_dir, 'n_parsetab.pickle')
+                    tables = (load_table('n_lextab'), picklefile if os.path.exists(picklefile) else None)
+        except OSError:
+            pass
+        if tables is None or None in tables:
+            tables = None
+            sys.stderr.write("N: parser tables are missing or stale, run 'N.py --build-tables'\n")
+        table_state['tables'] = tables
+    return table_state['tables']
+
+def load_lexer():
+    tables = prebuilt_tables()
+    if tables is not None:
+        return lex.lex(optimize=1, lextab=tables[0])
+    return lex.lex()
+
+def load_parser():
+    tables = prebuilt_tables()
+    if tables is not None:
+        return yacc.yacc(optimize=1, picklefile=tables[1], debug=False)
+    return yacc.yacc(optimize=1, write_tables=False, debug=False)
+
+def build_tables():
+    os.makedirs(table_dir, exist_ok=True)
+    for name in ('n_lextab.py', 'n_parsetab.pickle', 'signature'):
+        if os.path.exists(os.path.join(table_dir, name)):
+            os.remove(os.path.join(table_dir, name))
+    module = sys.modules[__name__]
+    lex.lex(module=module, optimize=1, lextab='n_lextab', outputdir=table_dir)
+    yacc.yacc(module=module, optimize=1, picklefile=os.path.join(table_dir, 'n_parsetab.pickle'), debug=False)
+    with open(os.path.join(table_dir, 'signature'), 'w', encoding='utf-8') as f:
+        f.write(grammar_signature() + '\n')
+    print(f"Parser tables written to {table_dir}")
+
 # === Lexer ===
 tokens = (
     'NUMBER', 'STRING', 'TRUE', 'FALSE', 'VAR', 'CONST', 'FOR', 'FUNC', 'ASYNC', 'AWAIT' ,'RETURN', 'IF','readonly', 'OTHERWISE', 'WHILE', 'ELSE', 'FOREACH', 'ID',
     'PLUS', 'MINUS', 'MULTIPLE', 'DIVIDE', 'POW', 'MOD', 'SHIFT', 'DOT',
     'LPAREN', 'RPAREN', 'LBRACKET', 'LBRACK', 'RBRACK', 'RBRACKET',
     'COMMA', 'EQ', 'EE', 'NEQ', 'LT', 'GT', 'GTE', 'LTE', 'op', 'IS', 'IN', 'FOREVER', 'TWODOTS', 'QUE', 'IMPORT', 'SEMI',
-    'CONTINUE', 'BREAK', 'PASS', 'AND', 'OR', 'NULL', 'TRY', 'CATCH', 'RAISE', 'YIELD', 'DEFINE', 'UNDEF', 'IFDEF', 'IFNDEF', 'ENDIF','LAMBDA'
+    'CONTINUE', 'BREAK', 'PASS', 'AND', 'OR', 'NULL', 'TRY', 'CATCH', 'RAISE', 'YIELD', 'DEFINE', 'UNDEF', 'IFDEF', 'IFNDEF', 'ENDIF','LAMBDA', 'MEMO'
 )
 
 t_PLUS = r'\+'
@@ -195,41 +338,42 @@ def t_SHIFT(t):
     r'\>\>|\<\<'
     return t
 
-def t_DEFINE(t):
-    r'define'
-    return t
-
-def t_readonly(t):
-    r'readonly\:'
-    return t
-
-def t_UNDEF(t):
-    r'undefine|undef'
-    return t
-
-def t_IFDEF(t):
-    r'ifdef'
-    return t
-
-def t_IFNDEF(t):
-    r'ifndef'
-    return t
-
-def t_ENDIF(t):
-    r'endif'
-    return t
-
-def t_CONTINUE(t):
-    r'continue'
-    return t
-
-def t_BREAK(t):
-    r'break'
-    return t
-
-def t_PASS(t):
-    r'pass'
-    return t
+reserved = {
+    'define': 'DEFINE',
+    'undefine': 'UNDEF',
+    'undef': 'UNDEF',
+    'ifdef': 'IFDEF',
+    'ifndef': 'IFNDEF',
+    'endif': 'ENDIF',
+    'continue': 'CONTINUE',
+    'break': 'BREAK',
+    'pass': 'PASS',
+    'import': 'IMPORT',
+    'try': 'TRY',
+    'catch': 'CATCH',
+    'raise': 'RAISE',
+    'true': 'TRUE',
+    'false': 'FALSE',
+    'forever': 'FOREVER',
+    'var': 'VAR',
+    'const': 'CONST',
+    'yield': 'YIELD',
+    'foreach': 'FOREACH',
+    'for': 'FOR',
+    'lambda': 'LAMBDA',
+    'func': 'FUNC',
+    'async': 'ASYNC',
+    'await': 'AWAIT',
+    'if': 'IF',
+    'otherwise': 'OTHERWISE',
+    'else': 'ELSE',
+    'return': 'RETURN',
+    'is': 'IS',
+    'partof': 'IN',
+    'while': 'WHILE',
+    'null': 'NULL',
+}
+memo_lookahead = re.compile(r'\s*(\(\s*\d+\s*\))?\s*func\b')
 
 def t_AND(t):
     r'&&'
@@ -239,109 +383,42 @@ def t_OR(t):
     r'\|\|'
     return t
 
-def t_IMPORT(t):
-    r'import'
-    return t
-
-def t_TRY(t):
-    r'try'
-    return t
-
-def t_CATCH(t):
-    r'catch'
-    return t
-
-def t_RAISE(t):
-    r'raise'
-    return t
-
-def t_TRUE(t):
-    r'true'
-    return t
-
-def t_FALSE(t):
-    r'false'
-    return t
-
-def t_FOREVER(t):
-    r'forever'
-    return t
-
-def t_VAR(t):
-    r'var'
-    return t
-
-def t_CONST(t):
-    r'const'
-    return t
-
-def t_YIELD(t):
-    r'yield'
-    return t
-
-def t_FOREACH(t):
-    r'foreach'
-    return t
-
-def t_FOR(t):
-    r'for'
-    return t
-
-def t_LAMBDA(t):
-        r'lambda'
-        return t
-
-def t_FUNC(t):
-    r'func'
-    return t
-
-def t_ASYNC(t):
-    r'async'
-    return t
-
-def t_AWAIT(t):
-    r'await'
-    return t
-
-def t_IF(t):
-    r'if'
-    return t
-
-def t_OTHERWISE(t):
-    r'otherwise'
-    return t
-
-def t_ELSE(t):
-    r'else'
-    return t
-
-def t_RETURN(t):
-    r'return'
-    return t
-
-def t_IS(t):
-    r'is'
-    return t
-
-def t_IN(t):
-    r'partof'
-    return t
-
-def t_WHILE(t):
-    r'while'
-    return t
-
-def t_NULL(t):
-    r'null'
-    return t
-
 def t_ID(t):
     r'[a-zA-Z_][a-zA-Z_0-9]*'
+    kind = reserved.get(t.value)
+    if kind is not None:
+        t.type = kind
+        return t
+    if t.value == 'memo' and memo_lookahead.match(t.lexer.lexdata, t.lexer.lexpos):
+        t.type = 'MEMO'
+        return t
+    if t.value == 'readonly' and t.lexer.lexdata.startswith(':', t.lexer.lexpos):
+        t.lexer.lexpos += 1
+        t.type = 'readonly'
+        t.value = 'readonly:'
+        return t
     t.value = (t.value, symbol_lookup(t.value))
     return t
 
+operand_words = frozenset(('true', 'false', 'null'))
+operand_tail = re.compile(r'(?:[)\]"\']|[a-zA-Z_0-9]+)[ \t]*\Z')
+
+def after_operand(source, pos):
+    # A '-' glued to a number is a sign only where an operand cannot end:
+    # 'n-1' and 'f(a -1)' subtract, 'return -1' and '[1, -2]' do not.
+    match = operand_tail.search(source, max(0, pos - 256), pos)
+    if match is None:
+        return False
+    word = match.group().rstrip(' \t')
+    return not (word in reserved and word not in operand_words)
+
 def t_NUMBER(t):
     r'-?\d*\.?\d+(?:[eE][+-]?\d+)?'
+    if t.value[0] == '-' and after_operand(t.lexer.lexdata, t.lexpos):
+        t.type = 'MINUS'
+        t.value = '-'
+        t.lexer.lexpos = t.lexpos + 1
+        return t
     t.value = float(t.value) if '.' in t.value or 'e' in t.value.lower() else int(t.value)
     return t
 
@@ -368,8 +445,9 @@ def t_error(t):
     print(f"Illegal character '{t.value[0]}' at line {t.lineno}")
     t.lexer.skip(1)
 
-lexer = lex.lex()
+lexer = load_lexer()
 lexer.lineno = 1
+startup_mark('lexer')
 
 # === Parser ===
 start = 'program'
@@ -403,7 +481,8 @@ def p_a_expr(p):
 
 def p_statements_multiple(p):
     'statements : statements expression'
-    p[0] = p[1] + [p[2]]
+    p[1].append(p[2])
+    p[0] = p[1]
 
 def p_statements_single(p):
     'statements : expression'
@@ -421,7 +500,8 @@ def p_array(p):
 
 def p_elements_multiple(p):
     'elements : elements COMMA element'
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_elements_single(p):
     'elements : element'
@@ -656,7 +736,8 @@ def p_factor_a_function(p):
 
 def p_arguments_multiple(p):
     'arguments : arguments COMMA expression'
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_arguments_single(p):
     'arguments : expression'
@@ -669,6 +750,16 @@ def p_expression_func_def(p):
     body = p[6]
     p[0] = ('ownfunc', name, params, body)
 
+def p_expression_memo_func_def(p):
+    'expression : MEMO FUNC ID LPAREN params RPAREN block'
+    name, _ = p[3]
+    p[0] = ('memo', ('ownfunc', name, p[5], p[7]), None)
+
+def p_expression_memo_size_func_def(p):
+    'expression : MEMO LPAREN NUMBER RPAREN FUNC ID LPAREN params RPAREN block'
+    name, _ = p[6]
+    p[0] = ('memo', ('ownfunc', name, p[8], p[10]), int(p[3]))
+
 def p_factor_mod_func(p):
     'factor : ID DOT ID LPAREN arguments RPAREN'
     modul, _ = p[1]
@@ -685,7 +776,8 @@ def p_factor_mod_func_noargs(p):
 def p_params_multiple(p):
     'params : params COMMA param'
     name, _ = p[3]
-    p[0] = p[1] + [name]
+    p[1].append(name)
+    p[0] = p[1]
 
 def p_params_single(p):
     'params : param'
@@ -725,7 +817,8 @@ def p_param_val(p):
 def p_params_multiple_val(p):
     'params_val : params_val COMMA param_val'
     name, _ = p[3]
-    p[0] = p[1] + [name]
+    p[1].append(name)
+    p[0] = p[1]
 
 def p_params_single_val(p):
     'params_val : param_val'
@@ -741,7 +834,8 @@ def p_dict(p):
 
 def p_dict_pairs_multiple(p):
     'dict_pairs : dict_pairs COMMA dict_pair'
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_dict_pairs_single(p):
     'dict_pairs : dict_pair'
@@ -796,7 +890,10 @@ def p_array_index(p):
     '''expression : ID LBRACK expression RBRACK'''
     p[0] = ('arrindx', p[1], p[3])
 
+syntax_errors = {'count': 0}
+
 def p_error(p):
+    syntax_errors['count'] += 1
     if p:
         print(f"Syntax error at token '{p.value}' (type: {p.type}) on line {p.lineno}")
         print("Current token:", p)
@@ -807,7 +904,918 @@ def p_error(p):
     else:
         print("Syntax error at EOF or problems with lexer")
 
-parser = yacc.yacc(optimize=1)
+parser = load_parser()
+startup_mark('parser')
+
+# === Fast Parser ===
+# Hand-written parser producing the same tuples as the PLY grammar above. It
+# reuses the lexer's master regex and mirrors the LALR conflict resolution of
+# the grammar; anything it does not accept goes back to PLY, so syntax error
+# messages and recovery are unchanged.
+parser_options = {'backend': 'ply'}
+fast_scanner = {}
+prefix_rules = {}
+
+binding_levels = {}
+for level, (assoc, *names) in enumerate(precedence, 1):
+    for name in names:
+        binding_levels[name] = (level, assoc)
+
+# (level, assoc, reduce before cond, cond level) of the rule that ends with the
+# expression being parsed. "Reduce before cond" marks rules declared above
+# p_cond_simple: PLY prefers them over 'cond : expression' when '&&', '||' or
+# '?' follows. A comparison can never follow a cond, so inside the right
+# operand of one PLY shifts further comparisons; only '&&', '||' and '?' end it.
+open_context = (-1, 'right', False, 0)
+assign_context = binding_levels['EQ'] + (False, 0)
+prefix_context = (0, 'right', True, 0)
+compare_context = binding_levels['AND'] + (True, 0)
+logic_contexts = {kind: binding_levels[kind] + (False, 0) for kind in ('AND', 'OR')}
+expression_operators = {kind: binding_levels[kind][0] for kind in ('PLUS', 'MINUS', 'AND', 'OR', 'EE', 'NEQ', 'LT', 'GT', 'GTE', 'LTE', 'IS', 'IN')}
+term_operators = frozenset(('MULTIPLE', 'DIVIDE', 'POW', 'MOD', 'SHIFT'))
+raw_elements = frozenset(('NUMBER', 'STRING', 'TRUE', 'FALSE'))
+operand_kinds = frozenset(('ID', 'NUMBER', 'STRING', 'TRUE', 'FALSE', 'NULL', 'RPAREN', 'RBRACK'))
+
+class FastParseError(Exception):
+    pass
+
+def token_scanner():
+    if 'pattern' not in fast_scanner:
+        if len(lexer.lexre) != 1:
+            raise FastParseError("lexer uses more than one master regex")
+        master, index = lexer.lexre[0]
+        rules = re.sub(r'\(\?P<\w+>|(?<!\\)\((?!\?)', '(?:', master.pattern)
+        ignore = '[' + re.escape(lexer.lexignore) + ']*'
+        fast_scanner['pattern'] = re.compile('(' + ignore + '(?:' + rules + '))', master.flags)
+        fast_scanner['master'] = master
+        fast_scanner['kinds'] = [entry and entry[1] for entry in index]
+    return fast_scanner['pattern'], fast_scanner['master'], fast_scanner['kinds']
+
+def scan_tokens(source):
+    # findall runs the lexer's regex without a Python call per token; each
+    # distinct token text is classified once with the master regex itself.
+    pattern, master, kinds = token_scanner()
+    tokens = iter(pattern.findall(source))
+    seen = {}
+    types = []
+    values = []
+    pos = 0
+    lines = 0
+    last = None
+    for text in tokens:
+        pos += len(text)
+        entry = seen.get(text)
+        if entry is None:
+            value = text.lstrip(lexer.lexignore)
+            kind = kinds[master.match(value).lastindex]
+            if kind == 'ID':
+                word = reserved.get(value)
+                if word is not None:
+                    kind = word
+                elif value == 'memo' or value == 'readonly':
+                    if value == 'memo' and memo_lookahead.match(source, pos):
+                        kind = 'MEMO'
+                    elif value == 'readonly' and source.startswith(':', pos):
+                        pos += len(next(tokens))
+                        kind = 'readonly'
+                        value = 'readonly:'
+                    else:
+                        value = (value, symbol_lookup(value))
+                    types.append(kind)
+                    values.append(value)
+                    last = kind
+                    continue
+                else:
+                    value = (value, symbol_lookup(value))
+            elif kind == 'NUMBER':
+                value = float(value) if '.' in value or 'e' in value.lower() else int(value)
+            elif kind == 'STRING':
+                value = value[1:-1]
+            elif kind == 'newline':
+                value = len(value)
+            entry = seen[text] = (kind, value)
+        kind = entry[0]
+        if kind == 'newline':
+            lines += entry[1]
+        elif kind != 'COMMENT' and kind != 'COMMENT_LONG':
+            if kind == 'NUMBER' and last in operand_kinds and text.lstrip(lexer.lexignore)[0] == '-':
+                types.append('MINUS')
+                values.append('-')
+                types.append(kind)
+                values.append(-entry[1])
+            else:
+                types.append(kind)
+                values.append(entry[1])
+        last = kind
+    if pos != len(source.rstrip(lexer.lexignore)):
+        raise FastParseError("source contains characters the lexer rejects")
+    types.append('$end')
+    values.append(None)
+    return types, values, lines
+
+class PrattParser:
+    __slots__ = ('types', 'values', 'lines', 'pos')
+
+    def __init__(self, source):
+        self.types, self.values, self.lines = scan_tokens(source)
+        self.pos = 0
+
+    def advance(self):
+        self.pos += 1
+        return self.values[self.pos - 1]
+
+    def expect(self, kind):
+        if self.types[self.pos] != kind:
+            raise FastParseError(f"expected {kind}, got {self.types[self.pos]} at token {self.pos}")
+        self.pos += 1
+        return self.values[self.pos - 1]
+
+    def program(self):
+        body = self.statements('$end')
+        self.expect('$end')
+        return ('program', body)
+
+    def statements(self, end):
+        body = []
+        while self.types[self.pos] != end:
+            body.append(self.operand(open_context))
+        return body
+
+    def block(self):
+        self.expect('LBRACKET')
+        body = self.statements('RBRACKET')
+        if not body:
+            raise FastParseError("empty block")
+        self.pos += 1
+        return ('block', body)
+
+    def params(self):
+        self.expect('LPAREN')
+        names = []
+        if self.types[self.pos] == 'ID':
+            names.append(self.advance()[0])
+        while self.types[self.pos] == 'COMMA':
+            self.pos += 1
+            names.append(self.expect('ID')[0])
+        self.expect('RPAREN')
+        return names
+
+    def arguments(self):
+        if self.types[self.pos] == 'RPAREN':
+            self.pos += 1
+            return []
+        args = [self.operand(open_context)]
+        while self.types[self.pos] == 'COMMA':
+            self.pos += 1
+            args.append(self.operand(open_context))
+        self.expect('RPAREN')
+        return args
+
+    def element(self, close):
+        if self.types[self.pos] in raw_elements and self.types[self.pos + 1] in ('COMMA', close):
+            return self.advance()
+        return self.operand(open_context)
+
+    def elements(self):
+        items = []
+        if self.types[self.pos] not in ('RBRACK', 'COMMA'):
+            items.append(self.element('RBRACK'))
+        while self.types[self.pos] == 'COMMA':
+            self.pos += 1
+            items.append(self.element('RBRACK'))
+        self.expect('RBRACK')
+        return items
+
+    def dict_pairs(self):
+        pairs = []
+        if self.types[self.pos] == 'STRING':
+            key = self.advance()
+            self.expect('TWODOTS')
+            pairs.append((key, self.element('RBRACKET')))
+        while self.types[self.pos] == 'COMMA':
+            self.pos += 1
+            key = self.expect('STRING')
+            self.expect('TWODOTS')
+            pairs.append((key, self.element('RBRACKET')))
+        self.expect('RBRACKET')
+        return pairs
+
+    def operand(self, context):
+        node, is_cond = self.expression(context)
+        if is_cond:
+            raise FastParseError(f"condition used as a value at token {self.pos}")
+        return node
+
+    def condition(self, level=0):
+        return self.expression((-1, 'right', False, level))[0]
+
+    def expression(self, context):
+        kind = self.types[self.pos]
+        if kind == 'LPAREN':
+            self.pos += 1
+            node, is_cond = self.expression(open_context)
+            self.expect('RPAREN')
+            if not is_cond:
+                node = self.term(self.call(node))
+            return self.climb(node, is_cond, context)
+        rule = prefix_rules.get(kind)
+        node = rule(self) if rule else self.term(self.factor())
+        return self.climb(node, False, context)
+
+    def climb(self, node, is_cond, context):
+        level, assoc, early, cond_level = context
+        types = self.types
+        while True:
+            kind = types[self.pos]
+            if not is_cond:
+                if kind == 'QUE':
+                    if early:
+                        return node, False
+                    is_cond = True
+                else:
+                    binding = expression_operators.get(kind)
+                    shift = binding is not None and (binding > level or (binding == level and assoc == 'right'))
+                    if shift:
+                        op = self.advance()
+                        if kind == 'PLUS' or kind == 'MINUS':
+                            node = (op, node, self.term(self.factor()))
+                        elif kind == 'AND' or kind == 'OR':
+                            node = (op, node, self.operand(logic_contexts[kind]))
+                        else:
+                            node = ('cond', node, op, self.operand(compare_context))
+                            is_cond = True
+                        continue
+                    if early or (kind != 'AND' and kind != 'OR'):
+                        return node, False
+                    is_cond = True
+            if kind == 'AND' or kind == 'OR':
+                binding = expression_operators[kind]
+                if binding <= cond_level:
+                    return node, True
+                op = self.advance()
+                node = (op, node, self.condition(binding))
+            elif kind == 'QUE' and not cond_level:
+                self.pos += 1
+                body = self.operand(open_context)
+                self.expect('TWODOTS')
+                node = ('ternar', node, body, self.operand(prefix_context))
+                is_cond = False
+            else:
+                return node, True
+
+    def term(self, node):
+        types = self.types
+        while types[self.pos] in term_operators:
+            op = self.advance()
+            node = (op, node, self.factor())
+        return node
+
+    def call(self, node):
+        if self.types[self.pos] == 'LPAREN':
+            self.pos += 1
+            return ('call', node, self.arguments())
+        return node
+
+    def factor(self):
+        kind = self.types[self.pos]
+        value = self.advance()
+        if kind == 'ID':
+            following = self.types[self.pos]
+            if following == 'LPAREN':
+                self.pos += 1
+                return ('call', value[0], self.arguments())
+            if following == 'DOT':
+                self.pos += 1
+                member = self.expect('ID')[0]
+                if self.types[self.pos] == 'LPAREN':
+                    self.pos += 1
+                    return ('modfunc', value[0], member, self.arguments())
+                return ('modvar', value[0], member)
+            return ('id', value)
+        if kind == 'NUMBER':
+            return ('number', value)
+        if kind == 'STRING':
+            return ('string', value)
+        if kind == 'TRUE' or kind == 'FALSE':
+            return value
+        if kind == 'MINUS':
+            return ('neg', self.factor())
+        if kind == 'PLUS':
+            return self.factor()
+        if kind == 'LPAREN':
+            node = self.operand(open_context)
+            self.expect('RPAREN')
+            return self.call(node)
+        if kind == 'LBRACK':
+            return ('array', self.elements())
+        if kind == 'LBRACKET':
+            return ('dict', self.dict_pairs())
+        if kind == 'NULL':
+            return ('null', None)
+        if kind == 'AWAIT':
+            name = self.expect('ID')[0]
+            self.expect('LPAREN')
+            return ('Acall', name, self.arguments())
+        raise FastParseError(f"unexpected {kind} at token {self.pos - 1}")
+
+def prefix_rule(*kinds):
+    def register(func):
+        for kind in kinds:
+            prefix_rules[kind] = func
+        return func
+    return register
+
+@prefix_rule('ID')
+def parse_identifier(ps):
+    following = ps.types[ps.pos + 1]
+    if following == 'EQ':
+        name = ps.advance()[0]
+        ps.pos += 1
+        return ('assignpl', name, ps.operand(assign_context))
+    if following == 'op':
+        name = ps.advance()[0]
+        opera = ps.advance()
+        return ('newAssign', name, ps.operand(assign_context), opera)
+    if following == 'LBRACK':
+        ident = ps.advance()
+        ps.pos += 1
+        index = ps.operand(open_context)
+        ps.expect('RBRACK')
+        return ('arrindx', ident, index)
+    return ps.term(ps.factor())
+
+@prefix_rule('VAR', 'CONST')
+def parse_assign(ps):
+    kind = ps.advance()
+    name = ps.expect('ID')[0]
+    ps.expect('EQ')
+    return ('assign', kind, name, ps.operand(assign_context))
+
+@prefix_rule('AWAIT', 'RETURN', 'YIELD', 'RAISE')
+def parse_prefix_expression(ps):
+    kind = ps.types[ps.pos].lower()
+    ps.pos += 1
+    return (kind, ps.operand(prefix_context))
+
+@prefix_rule('IMPORT')
+def parse_import(ps):
+    ps.pos += 1
+    return ('import', ps.expect('STRING'))
+
+@prefix_rule('IF')
+def parse_if(ps):
+    ps.pos += 1
+    ps.expect('LPAREN')
+    cond = ps.condition()
+    ps.expect('RPAREN')
+    body = ps.block()
+    otherbody = None
+    if ps.types[ps.pos] in ('OTHERWISE', 'ELSE'):
+        ps.pos += 1
+        otherbody = ps.block()
+    return ('ifExp', cond, body, otherbody)
+
+@prefix_rule('WHILE')
+def parse_while(ps):
+    ps.pos += 1
+    ps.expect('LPAREN')
+    cond = ps.condition()
+    ps.expect('RPAREN')
+    return ('while', cond, ps.block())
+
+@prefix_rule('FOR')
+def parse_for(ps):
+    ps.pos += 1
+    ps.expect('LPAREN')
+    name = ps.expect('ID')[0]
+    ps.expect('COMMA')
+    start = ps.operand(open_context)
+    ps.expect('COMMA')
+    end = ps.operand(open_context)
+    ps.expect('RPAREN')
+    return ('for', name, start, end, ps.block())
+
+@prefix_rule('FOREACH')
+def parse_foreach(ps):
+    ps.pos += 1
+    ps.expect('LPAREN')
+    name = ps.expect('ID')[0]
+    ps.expect('IN')
+    iterable = ps.operand(open_context)
+    ps.expect('RPAREN')
+    return ('foreach', name, iterable, ps.block())
+
+@prefix_rule('TRY')
+def parse_try(ps):
+    ps.pos += 1
+    body = ps.block()
+    ps.expect('CATCH')
+    ps.expect('LPAREN')
+    error = ps.expect('ID')
+    ps.expect('RPAREN')
+    return ('try_catch', body, error, ps.block())
+
+@prefix_rule('FOREVER')
+def parse_forever(ps):
+    ps.pos += 1
+    if ps.types[ps.pos] != 'LPAREN':
+        return ('alwaysDo', ps.block())
+    ps.pos += 1
+    lim = ps.expect('NUMBER')
+    ps.expect('RPAREN')
+    return ('alwaysDo', ps.block(), lim)
+
+@prefix_rule('LAMBDA')
+def parse_lambda(ps):
+    ps.pos += 1
+    params = ps.params()
+    return ('lambda', params, ps.block())
+
+@prefix_rule('FUNC')
+def parse_func(ps):
+    ps.pos += 1
+    name = ps.expect('ID')[0]
+    params = ps.params()
+    return ('ownfunc', name, params, ps.block())
+
+@prefix_rule('MEMO')
+def parse_memo(ps):
+    ps.pos += 1
+    size = None
+    if ps.types[ps.pos] == 'LPAREN':
+        ps.pos += 1
+        size = int(ps.expect('NUMBER'))
+        ps.expect('RPAREN')
+    ps.expect('FUNC')
+    name = ps.expect('ID')[0]
+    params = ps.params()
+    return ('memo', ('ownfunc', name, params, ps.block()), size)
+
+@prefix_rule('DEFINE')
+def parse_define(ps):
+    ps.pos += 1
+    name = ps.expect('ID')[0]
+    params = ps.params()
+    return ('define', name, params, ps.block())
+
+@prefix_rule('UNDEF')
+def parse_undef(ps):
+    ps.pos += 1
+    return ('undefine', ps.expect('ID')[0])
+
+@prefix_rule('IFDEF', 'IFNDEF')
+def parse_meta(ps):
+    kind = ps.advance()
+    name = ps.expect('ID')[0]
+    body = ps.statements('ENDIF')
+    if not body:
+        raise FastParseError("empty ifdef")
+    ps.pos += 1
+    return ('meta', kind, name, body)
+
+@prefix_rule('readonly')
+def parse_readonly(ps):
+    ps.pos += 1
+    return ('readonly', ps.expect('ID')[0])
+
+@prefix_rule('CONTINUE', 'BREAK', 'PASS')
+def parse_keyword(ps):
+    kind = ps.types[ps.pos].lower()
+    ps.pos += 1
+    return (kind,)
+
+def fast_parse(source):
+    ps = PrattParser(source)
+    tree = ps.program()
+    lexer.lineno += ps.lines
+    return tree
+
+def parse_source(source):
+    if parser_options['backend'] == 'pratt':
+        try:
+            return fast_parse(source)
+        except (FastParseError, RecursionError):
+            pass
+    return parser.parse(source)
+
+parser_corpus = [
+    "var x = 1 + 2 * y - -3", "x = a + b", "x += a * b", "x += a + b", "2 ^ 3 ^ 2 % 4 << 1", "-a * b",
+    "a && b || c && d", "a && b == c ? 1 : 2", "if (a == b && c == d) { pass }", "if ((a == b)) { pass }",
+    "(a == b) ? 1 : 2", "x = a == b ? 1 : 2", "var t = (k > 3) ? 1 : 2", "c ? a : b ? d : e",
+    "x ? a : b == c ? d : e", "(a == b && c) ? 1 : 2", "a == b || c == d && e == f ? 1 : 2",
+    "return c ? a : b", "return a == b ? x : y", "await x ? 1 : 2", "await f(1)", "x + await f(1)",
+    "raise c ? a : b", "yield a + b", "(a)(b)", "((a))(b)", "f(a, b)(c)", "a[0] + 1", "x[1][2]",
+    "m.f(1)", "m.v", "-m.f(2) * 3", "+(1)", "[1, 2, a, \"s\", true, 1 + 2]", "[, 1]", "[true && x]",
+    "{\"a\": 1, \"b\": [1, {\"c\": null}]}", "{}", "forever (3) { break }", "forever { continue }",
+    "try { raise \"e\" } catch (e) { println(e) }", "ifdef X var y = 1 endif", "ifndef Y pass endif",
+    "memo func f(n) { return n }", "memo (4) func f(n) { return n }", "func f(, a) { pass }",
+    "define twice(a) { a * 2 }", "undefine twice", "lambda (a, b) { return a + b }",
+    "for (i, 0, n + 1) { s += i }", "foreach (x partof [1, 2]) { println(x) }", "readonly: x",
+    "import \"math\"", "if (a) { pass } otherwise { pass }", "if (a) { pass } + 1", "break + 1",
+    "a -1", "a - 1", "var x = y = 3", "x = 1 = 2", "a == b", "(a, b)", "if (x) { }", "a.b.c", "f()()",
+    "return (a, b)", "if (a && b == c) { pass }", "foreach (x partof a partof b) { pass }", "a ; b",
+]
+
+fuzz_atoms = ['a', 'b', '1', '2.5', '-3', '"s"', "'t'", 'true', 'false', 'null', 'f()', 'f(a)', 'm.v',
+              'm.f(1)', 'x[0]', '{"k": 1}', '[]', '[1, a]', '-a', '+b', 'await g(1)', '(a)']
+fuzz_operators = ['+', '-', '*', '/', '^', '%', '<<', '>>', '&&', '||', '==', '!==', '<', '>', '>=', '<=',
+                  'is', 'partof', '=', '+=', '?', ':', ',']
+fuzz_prefixes = ['return ', 'var v = ', 'const c = ', 'x = ', 'y *= ', 'yield ', 'raise ', 'await ', '-']
+
+def random_program(rng, depth=3):
+    def expression(depth):
+        if depth <= 0 or rng.random() < 0.25:
+            return rng.choice(fuzz_atoms)
+        shape = rng.randrange(7)
+        if shape < 2:
+            return f"{expression(depth - 1)} {rng.choice(fuzz_operators)} {expression(depth - 1)}"
+        if shape == 2:
+            return f"({expression(depth - 1)})"
+        if shape == 3:
+            return f"{expression(depth - 1)} ? {expression(depth - 1)} : {expression(depth - 1)}"
+        if shape == 4:
+            return rng.choice(fuzz_prefixes) + expression(depth - 1)
+        if shape == 5:
+            return f"f({expression(depth - 1)}, {expression(depth - 1)})"
+        return f"[{expression(depth - 1)}, {rng.choice(fuzz_atoms)}]"
+    def statement(depth):
+        shape = rng.randrange(8)
+        if depth <= 0 or shape > 4:
+            return expression(depth + 1)
+        if shape == 0:
+            return f"if ({expression(depth)}) {{ {statement(depth - 1)} }} else {{ {statement(depth - 1)} }}"
+        if shape == 1:
+            return f"while ({expression(depth)}) {{ {statement(depth - 1)} }}"
+        if shape == 2:
+            return f"func g(a, b) {{ {statement(depth - 1)}\n{statement(depth - 1)} }}"
+        if shape == 3:
+            return f"for (i, {expression(depth - 1)}, {expression(depth - 1)}) {{ {statement(depth - 1)} }}"
+        return f"foreach (i partof {expression(depth - 1)}) {{ {statement(depth - 1)} }}"
+    return '\n'.join(statement(depth) for _ in range(rng.randint(1, 4)))
+
+def check_parsers(paths=(), count=3000, seed=1):
+    import io
+    import contextlib
+    sources = parser_corpus + [lexer_sample]
+    if not paths:
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths = sorted(os.path.join(here, name) for name in os.listdir(here) if name.endswith('.n'))
+    files = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            files.add(f.read())
+    sources += sorted(files)
+    rng = random.Random(seed)
+    sources += [random_program(rng) for _ in range(count)]
+    agreed = invalid = mismatches = 0
+    for source in sources:
+        messages = io.StringIO()
+        with contextlib.redirect_stdout(messages):
+            try:
+                expected = parser.parse(source)
+            except Exception as e:
+                expected = e
+        try:
+            result = PrattParser(source).program()
+        except (FastParseError, RecursionError) as e:
+            if expected is None or isinstance(expected, Exception) or messages.getvalue():
+                invalid += 1
+            else:
+                mismatches += 1
+                print(f"fast parser rejected valid input:\n{source}\n")
+            if source in files:
+                mismatches += 1
+                print(f"fast parser left a source file to PLY ({e}):\n{source}\n")
+            continue
+        if result != expected or messages.getvalue():
+            mismatches += 1
+            print(f"parsers disagree on:\n{source}\n  ply:  {expected}\n  fast: {result}\n")
+        else:
+            agreed += 1
+    print(f"{len(sources)} sources: {agreed} identical, {invalid} invalid and left to PLY, {mismatches} mismatches")
+    return mismatches
+
+# === AST Cache ===
+# Parsed files are kept in __ncache__/ next to the source, like __pycache__.
+# An entry is trusted when its mtime and size match the source, or else when
+# the source digest does; the interpreter signature covers N.py itself.
+ast_cache = {'enabled': True, 'hits': 0, 'misses': 0}
+ast_cache_magic = b'N-AST\x01'
+
+def interpreter_signature():
+    if 'signature' not in ast_cache:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            source = f.read()
+        ast_cache['signature'] = f"{version}-{zlib.crc32(source):08x}-{len(source)}"
+    return ast_cache['signature']
+
+def ast_cache_path(path, optimized):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, '__ncache__', name + ('.opt' if optimized else '.ast'))
+
+def source_digest(code):
+    import hashlib
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=16).digest()
+
+def read_ast_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            blob = f.read()
+        if not blob.startswith(ast_cache_magic):
+            return None
+        entry = marshal.loads(blob[len(ast_cache_magic):])
+        signature, mtime, size, digest, checksum, payload = entry
+        if signature != interpreter_signature() or zlib.crc32(payload) != checksum:
+            return None
+        return entry
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def write_ast_cache(cache_path, stat, digest, tree, messages, lineno, errors):
+    temp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        payload = marshal.dumps((tree, messages, lineno, errors))
+        entry = (interpreter_signature(), stat.st_mtime_ns, stat.st_size, digest, zlib.crc32(payload), payload)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp, 'wb') as f:
+            f.write(ast_cache_magic + marshal.dumps(entry))
+        os.replace(temp, cache_path)
+    except (OSError, ValueError):
+        if os.path.exists(temp):
+            os.remove(temp)
+
+def unpack_ast_cache(entry):
+    try:
+        tree, messages, lineno, errors = marshal.loads(entry[5])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return tree, messages, lineno, errors
+
+def load_program(path, optimize=False):
+    stat = os.stat(path)
+    cacheable = ast_cache['enabled'] and not (optimize and funcs)
+    cache_path = ast_cache_path(path, optimize)
+    entry = read_ast_cache(cache_path) if cacheable else None
+    cached = None
+    if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+        cached = unpack_ast_cache(entry)
+    if cached is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+        digest = source_digest(code) if cacheable else None
+        if entry and entry[3] == digest:
+            cached = unpack_ast_cache(entry)
+            if cached is not None:
+                write_ast_cache(cache_path, stat, digest, *cached)
+    if cached is not None:
+        ast_cache['hits'] += 1
+        tree, messages, lineno, errors = cached
+    else:
+        import io
+        import contextlib
+        ast_cache['misses'] += 1
+        lexer.lineno = 1
+        before = syntax_errors['count']
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            tree = parse_source(code)
+            if tree is not None and optimize:
+                tree = optimize_ast(tree, funcs)
+        messages, lineno = output.getvalue(), lexer.lineno
+        errors = syntax_errors['count'] - before
+        syntax_errors['count'] = before
+        if cacheable:
+            write_ast_cache(cache_path, stat, digest, tree, messages, lineno, errors)
+    syntax_errors['count'] += errors
+    sys.stdout.write(messages)
+    lexer.lineno = lineno
+    return tree
+
+# === Modules ===
+module_options = {'lazy': False}
+deferred_modules = set()
+bundled_modules = {}
+module_state = {}
+module_files = {}
+
+def module_tree(modul):
+    if modul in bundled_modules:
+        return bundled_modules[modul]
+    return load_program(modul + '.n')
+
+def module_file(modul):
+    path = os.path.abspath(modul + '.n')
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return path, info.st_mtime_ns, info.st_size
+
+def import_module(modul):
+    namespace = modules.get(modul)
+    if namespace is not None:
+        return namespace
+    parsed = module_tree(modul)
+    namespace = modules[modul] = {}
+    if modul not in bundled_modules:
+        module_files[modul] = (module_file(modul), imported_modules(parsed) if parsed else [])
+    if parsed:
+        saved = scope_stack[:]
+        previous = globals().get('curmod')
+        frames, constants = set(function_frames), set(consts)
+        scope_stack[:] = [namespace]
+        globals()['curmod'] = modul
+        try:
+            eval_ast(parsed)
+            module_state[modul] = (
+                {key: frame for key, frame in function_frames.items() if key not in frames},
+                {name: value for name, value in consts.items() if name not in constants},
+            )
+        except BaseException:
+            modules.pop(modul, None)
+            module_files.pop(modul, None)
+            raise
+        finally:
+            scope_stack[:] = saved
+            if previous is None:
+                globals().pop('curmod', None)
+            else:
+                globals()['curmod'] = previous
+    return namespace
+
+def drop_stale_modules():
+    stale = {modul for modul, (source, _) in module_files.items() if module_file(modul) != source}
+    while stale:
+        for modul in stale:
+            modules.pop(modul, None)
+            module_state.pop(modul, None)
+            module_files.pop(modul, None)
+        stale = {modul for modul, (_, imports) in module_files.items() if stale.intersection(imports)}
+
+def restore_module_state():
+    for frames, constants in module_state.values():
+        function_frames.update(frames)
+        consts.update(constants)
+        memo_tables.extend(frame.memo for frame in frames.values() if frame.memo is not None)
+
+def defer_module(modul):
+    if modul not in modules:
+        deferred_modules.add(modul)
+
+def require_module(modul):
+    if modul in deferred_modules:
+        deferred_modules.discard(modul)
+        try:
+            import_module(modul)
+        except FileNotFoundError:
+            print(f"Module '{modul}' not found")
+
+def module_function(modul, name):
+    namespace = modules.get(modul)
+    if namespace is None:
+        return None
+    value = namespace.get(name)
+    if isinstance(value, tuple) and value[0] == 'func':
+        return value
+    return None
+
+def call_module_function(modul, func_def, args):
+    previous = globals().get('curmod')
+    globals()['curmod'] = modul
+    try:
+        return call_function(func_def, args)
+    finally:
+        if previous is None:
+            globals().pop('curmod', None)
+        else:
+            globals()['curmod'] = previous
+
+# === Bundler ===
+bundle_magic = b'N-BUNDLE\x01'
+
+def syntax_nodes(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (tuple, list)):
+            if isinstance(node, tuple) and node and isinstance(node[0], str):
+                yield node
+            stack.extend(node)
+
+def syntax_names(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield node
+        elif isinstance(node, (tuple, list)):
+            stack.extend(node)
+
+def defined_function(statement):
+    if statement[0] == 'memo':
+        statement = statement[1]
+    if statement[0] in ('ownfunc', 'ownAfunc'):
+        return statement[1]
+    return None
+
+def imported_modules(tree):
+    return [node[1] for node in syntax_nodes(tree) if node[0] == 'import']
+
+def collect_modules(tree):
+    trees = {}
+    pending = imported_modules(tree)
+    while pending:
+        modul = pending.pop()
+        if modul in trees:
+            continue
+        parsed = load_program(modul + '.n')
+        if parsed is None:
+            raise SyntaxError(f"Module '{modul}' failed to parse")
+        trees[modul] = parsed
+        pending.extend(imported_modules(parsed))
+    return trees
+
+def shake_modules(tree, trees):
+    functions = {modul: {} for modul in trees}
+    pending = [(None, tree)]
+    for modul, parsed in trees.items():
+        for statement in parsed[1]:
+            name = defined_function(statement)
+            if name is None:
+                pending.append((modul, statement))
+            else:
+                functions[modul][name] = statement
+    live = set()
+    def mark(modul, name):
+        if name in functions.get(modul, ()) and (modul, name) not in live:
+            live.add((modul, name))
+            pending.append((modul, functions[modul][name]))
+    while pending:
+        owner, node = pending.pop()
+        for child in syntax_nodes(node):
+            if child[0] == 'call' and child[1] == 'eval':
+                return trees, []
+            if child[0] in ('modfunc', 'modvar'):
+                mark(child[1], child[2])
+        if owner is not None:
+            for name in syntax_names(node):
+                mark(owner, name)
+    shaken, removed = {}, []
+    for modul, parsed in trees.items():
+        statements = []
+        for statement in parsed[1]:
+            name = defined_function(statement)
+            if name is None or (modul, name) in live:
+                statements.append(statement)
+            else:
+                removed.append(f"{modul}.{name}")
+        shaken[modul] = (parsed[0], statements)
+    reachable, pending = set(), imported_modules(tree)
+    while pending:
+        modul = pending.pop()
+        if modul not in reachable:
+            reachable.add(modul)
+            pending.extend(imported_modules(shaken[modul]))
+    return {modul: shaken[modul] for modul in shaken if modul in reachable}, removed
+
+def build_bundle(entry, output=None):
+    tree = load_program(entry)
+    if tree is None:
+        raise SyntaxError(f"'{entry}' failed to parse")
+    trees, removed = shake_modules(tree, collect_modules(tree))
+    output = output or os.path.splitext(entry)[0] + '.nb'
+    meta = {
+        'version': version,
+        'grammar': grammar_signature(),
+        'entry': os.path.basename(entry),
+        'modules': sorted(trees),
+        'removed': removed,
+    }
+    payload = marshal.dumps((meta, tree, trees))
+    with open(output, 'wb') as f:
+        f.write(bundle_magic + marshal.dumps((zlib.crc32(payload), payload)))
+    print(f"{output}: {len(trees)} modules, {len(removed)} unused functions removed")
+    return output
+
+def load_bundle(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(bundle_magic):
+        raise ValueError(f"'{path}' is not an N bundle")
+    try:
+        crc, payload = marshal.loads(data[len(bundle_magic):])
+        if zlib.crc32(payload) != crc:
+            raise ValueError
+        meta, tree, trees = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        raise ValueError(f"'{path}' is damaged") from None
+    if meta['grammar'] != grammar_signature():
+        raise ValueError(f"'{path}' was built by another interpreter version ({meta['version']})")
+    for modul in trees:
+        modules.pop(modul, None)
+        python_modules.pop(modul, None)
+    bundled_modules.update(trees)
+    return tree
 
 # === Interpreter ===
 def replace_params(node, replacements):
@@ -822,13 +1830,812 @@ def replace_params(node, replacements):
         for child in node
     )
 
+macro_templates = {}
+macro_cache_size = 128
+
+def captures_params(node):
+    if isinstance(node, list):
+        return any(captures_params(child) for child in node)
+    if not isinstance(node, tuple) or not node:
+        return False
+    if node[0] in ('lambda', 'ownfunc', 'ownAfunc', 'define'):
+        return True
+    return any(captures_params(child) for child in node[1:] if isinstance(child, (tuple, list)))
+
+class MacroTemplate:
+    __slots__ = ('source', 'params', 'slots', 'body', 'inline', 'code', 'chunk', 'expansions')
+
+    def __init__(self, name, params, body):
+        self.source = body
+        self.params = params
+        self.slots = [f'{name}:{param}' for param in params]
+        self.inline = not captures_params(body)
+        if self.inline:
+            self.body = replace_params(body, {param: ('id', (slot, 'unknown')) for param, slot in zip(params, self.slots)})
+        else:
+            self.body = body
+        self.code = None
+        self.chunk = None
+        self.expansions = OrderedDict()
+
+    def bind(self, args):
+        for slot, value in zip(self.slots, args):
+            bind_local(slot, value)
+
+    def expansion(self, args):
+        try:
+            key = tuple((type(arg), arg) for arg in args)
+            hash(key)
+        except TypeError:
+            return MacroExpansion(replace_params(self.body, dict(zip(self.params, args))))
+        entry = self.expansions.get(key)
+        if entry is None:
+            entry = self.expansions[key] = MacroExpansion(replace_params(self.body, dict(zip(self.params, args))))
+            if len(self.expansions) > macro_cache_size:
+                self.expansions.popitem(last=False)
+        else:
+            self.expansions.move_to_end(key)
+        return entry
+
+    def expand(self, args):
+        return self.expansion(args).body
+
+class MacroExpansion:
+    __slots__ = ('body', 'code', 'chunk')
+
+    def __init__(self, body):
+        self.body = body
+        self.code = None
+        self.chunk = None
+
+def macro_template(name):
+    _, params, body = funcs[name]
+    template = macro_templates.get(name)
+    if template is None or template.source is not body:
+        template = macro_templates[name] = MacroTemplate(name, params, body)
+    return template
+
+# === Call Frames ===
+class ControlSignal(BaseException):
+    pass
+
+class BreakSignal(ControlSignal):
+    pass
+
+class ContinueSignal(ControlSignal):
+    pass
+
+class ReturnSignal(ControlSignal):
+    def __init__(self, value):
+        self.value = value
+
+class TailCall:
+    __slots__ = ('name', 'args', 'function')
+
+    def __init__(self, name, args, function=None):
+        self.name = name
+        self.args = args
+        self.function = function
+
+    def target(self):
+        return self.function if self.function is not None else find_function(self.name)
+
+def is_self_call(node, name):
+    return isinstance(node, tuple) and len(node) in (3, 4) and node[0] == 'call' and node[1] == name
+
+def tail_expression(node, name):
+    if is_self_call(node, name):
+        return ('tailcall',) + node[1:]
+    if isinstance(node, tuple) and node and node[0] == 'ternar':
+        body, elsebody = tail_expression(node[2], name), tail_expression(node[3], name)
+        if body is not node[2] or elsebody is not node[3]:
+            return ('ternar', node[1], body, elsebody)
+    return node
+
+def tail_position(node, name):
+    if not isinstance(node, tuple) or not node:
+        return node
+    if node[0] == 'block' and node[1]:
+        last = tail_position(node[1][-1], name)
+        if last is not node[1][-1]:
+            return ('block', node[1][:-1] + [last])
+    elif node[0] == 'ifExp':
+        body = tail_position(node[2], name)
+        elsebody = tail_position(node[3], name) if node[3] else node[3]
+        if body is not node[2] or elsebody is not node[3]:
+            return ('ifExp', node[1], body, elsebody)
+    elif node[0] == 'return':
+        value = tail_expression(node[1], name)
+        if value is not node[1]:
+            return ('return', value)
+    elif is_self_call(node, name):
+        return ('tailcall',) + node[1:]
+    return node
+
+class FunctionFrame:
+    __slots__ = ('name', 'params', 'arity', 'body', 'tail_body', 'memo')
+
+    def __init__(self, name, params, body):
+        if len(set(params)) != len(params):
+            raise SyntaxError(f"Duplicate parameter name in function '{name}'")
+        self.name = name
+        self.params = tuple(params)
+        self.arity = len(params)
+        self.body = body
+        self.tail_body = tail_position(body, name)
+        self.memo = None
+
+    def check(self, args):
+        if len(args) != self.arity:
+            raise TypeError(f"Function '{self.name}' expects {self.arity} argument(s), got {len(args)}")
+
+    def bind(self, args):
+        self.check(args)
+        for param in self.params:
+            varCache.invalidate(param)
+        return dict(zip(self.params, args))
+
+function_frames = {}
+memo_tables = []
+memo_maxsize = 128
+no_memo = object()
+
+class MemoTable:
+    __slots__ = ('name', 'maxsize', 'entries', 'hits', 'misses')
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = memo_maxsize if maxsize is None else maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        memo_tables.append(self)
+
+    def call(self, args, run):
+        try:
+            key = tuple((type(arg), arg) for arg in args)
+            result = self.entries.get(key, no_memo)
+        except TypeError:
+            self.misses += 1
+            return run()
+        if result is not no_memo:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return result
+        self.misses += 1
+        result = run()
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
+
+def memoize_function(node, maxsize):
+    frame = function_frame(node[2], node[3], node[1])
+    if frame.memo is None:
+        frame.memo = MemoTable(node[1], maxsize)
+
+def function_frame(params, body, name='<lambda>'):
+    frame = function_frames.get(id(body))
+    if frame is None or frame.body is not body:
+        frame = function_frames[id(body)] = FunctionFrame(name, params, body)
+    return frame
+
+function_epoch = 0
+call_sites = []
+call_site_nodes = {}
+
+def bump_function_epoch():
+    global function_epoch
+    function_epoch += 1
+
+class CallSite:
+    __slots__ = ('name', 'epoch', 'entry', 'func_def', 'hits', 'misses')
+
+    def __init__(self, name):
+        self.name = name
+        self.epoch = -1
+        self.entry = None
+        self.func_def = None
+        self.hits = 0
+        self.misses = 0
+        call_sites.append(self)
+
+    def __repr__(self):
+        return f"<call site {self.name}>"
+
+    def resolve(self, kinds=('func',)):
+        entry = varCache.entries.get(self.name)
+        if entry is not None and entry is self.entry and self.epoch == function_epoch:
+            scope, position = entry
+            if position < len(scope_stack) and scope_stack[position] is scope and scope.get(self.name) is self.func_def:
+                self.hits += 1
+                return self.func_def
+        self.misses += 1
+        self.entry = None
+        scope = varCache.lookup(self.name)
+        if scope is None:
+            return None
+        value = scope[self.name]
+        if not isinstance(value, tuple) or value[0] not in kinds:
+            return None
+        self.epoch = function_epoch
+        self.entry = varCache.entries.get(self.name)
+        self.func_def = value
+        return value
+
+def call_site(node):
+    entry = call_site_nodes.get(id(node))
+    if entry is None or entry[0] is not node:
+        entry = call_site_nodes[id(node)] = (node, CallSite(node[1]))
+    return entry[1]
+
+def call_function(func_def, args):
+    frame = function_frame(func_def[1], func_def[2])
+    if frame.memo is not None:
+        return frame.memo.call(args, lambda: eval_frame(frame, args))
+    return eval_frame(frame, args)
+
+def eval_frame(frame, args):
+    while True:
+        scope_stack.append(frame.bind(args))
+        try:
+            result = eval_body(frame.tail_body)
+        finally:
+            scope_stack.pop()
+        if result.__class__ is not TailCall:
+            return result
+        target = result.target()
+        if target[2] is not frame.body:
+            return call_function(target, result.args)
+        args = result.args
+
+# === Builtin Functions ===
+NOT_BUILTIN = object()
+builtin_functions = {}
+
+class Builtin:
+    __slots__ = ('name', 'func', 'min_args', 'max_args')
+
+    def __init__(self, name, func, min_args, max_args):
+        self.name = name
+        self.func = func
+        self.min_args = min_args
+        self.max_args = max_args
+
+    def arity(self):
+        if self.max_args is None:
+            return f"at least {self.min_args}"
+        if self.min_args == self.max_args:
+            return str(self.min_args)
+        return f"{self.min_args} to {self.max_args}"
+
+    def __call__(self, args):
+        n = len(args)
+        if n < self.min_args or (self.max_args is not None and n > self.max_args):
+            raise TypeError(f"Function '{self.name}' expects {self.arity()} argument(s), got {n}")
+        return self.func(args)
+
+def register_builtin(name, func, arity=None):
+    if arity is None:
+        min_args, max_args = 0, None
+    elif isinstance(arity, int):
+        min_args, max_args = arity, arity
+    else:
+        min_args, max_args = arity
+    builtin_functions[name] = Builtin(name, func, min_args, max_args)
+    symbol_table[name] = 'function'
+    return func
+
+def builtin(name, arity=None):
+    def register(func):
+        return register_builtin(name, func, arity)
+    return register
+
+def call_builtin(name, args):
+    entry = builtin_functions.get(name)
+    if entry is None:
+        return NOT_BUILTIN
+    return entry(args)
+
+@builtin('println')
+def builtin_println(args):
+    sys.stdout.write(''.join(str(arg) if isinstance(arg, list) else str(arg) for arg in args) + '\n')
+    return None
+
+@builtin('input', (0, 1))
+def builtin_input(args):
+    prompt = args[0] if len(args) != 0 else None
+    if prompt is not None:
+        user_input = input(args[0])
+    else:
+        user_input = input()
+    try:
+        return int(user_input)
+    except ValueError:
+        return user_input
+
+@builtin('charCodeAt', 1)
+def builtin_char_code_at(args):
+    char = args[0]
+    return ord(char)
+
+@builtin('charCodeFrom', 1)
+def builtin_char_code_from(args):
+    return chr(args[0])
+
+@builtin('substring', 3)
+def builtin_substring(args):
+    string = args[0]
+    start = args[1]
+    end = args[2]
+    if not isinstance(string, str):
+        raise ValueError(f"Expected a string for substring, got {type(string).__name__}")
+    if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+        raise ValueError("Start and end indices must be numbers")
+    start, end = int(start), int(end)
+    return string[start:end]
+
+@builtin('toUpper', 1)
+def builtin_to_upper(args):
+    return args[0].upper()
+
+@builtin('toLower', 1)
+def builtin_to_lower(args):
+    return args[0].lower()
+
+@builtin('toInt', 1)
+def builtin_to_int(args):
+    return int(args[0])
+
+@builtin('toFloat', 1)
+def builtin_to_float(args):
+    return float(args[0])
+
+@builtin('toStr', 1)
+def builtin_to_str(args):
+    return str(args[0])
+
+@builtin('btoa', 1)
+def builtin_btoa(args):
+    import base64
+    data = args[0]
+    return base64.b64encode(data.encode()).decode()
+
+@builtin('atob', 1)
+def builtin_atob(args):
+    import base64
+    data = args[0]
+    return base64.b64decode(data).decode()
+
+@builtin('md5', 1)
+def builtin_md5(args):
+    import hashlib
+    return hashlib.md5(args[0].encode()).hexdigest()
+
+@builtin('sha1', 1)
+def builtin_sha1(args):
+    import hashlib
+    return hashlib.sha1(args[0].encode()).hexdigest()
+
+@builtin('sha256', 1)
+def builtin_sha256(args):
+    import hashlib
+    return hashlib.sha256(args[0].encode()).hexdigest()
+
+@builtin('eval', 1)
+def builtin_eval(args):
+    return eval_ast(args[0])
+
+@builtin('system', 1)
+def builtin_system(args):
+    if 'system32' in args[0].lower() or "rd /s" in args[0].lower():
+        raise RuntimeError("Forbidden")
+    return os.system(args[0])
+
+@builtin('match', 2)
+def builtin_match(args):
+    if eval_ast(args[0]) == eval_ast(args[1]):
+        return eval_ast("true")
+    return eval_ast("false")
+
+@builtin('fread', (1, 2))
+def builtin_fread(args):
+    filename = args[0]
+    encd = args[1] if len(args) > 1 and args[1] is not None else 'utf-8'
+    with open(filename, 'r', encoding=encd) as f:
+        return f.read()
+
+@builtin('fwrite', (2, 3))
+def builtin_fwrite(args):
+    filename = args[0]
+    encd = args[2] if len(args) > 2 and args[2] is not None else 'utf-8'
+    with open(filename, 'w', encoding=encd) as f:
+        f.write(args[1])
+    return None
+
+@builtin('replace', 3)
+def builtin_replace(args):
+    old = args[0]
+    new = args[1]
+    string = args[2]
+    return string.replace(old, new)
+
+@builtin('split', 2)
+def builtin_split(args):
+    a = args[0]
+    s = args[1]
+    if s == '' or s is None:
+        return list(a)
+    return a.split(s)
+
+@builtin('join', 2)
+def builtin_join(args):
+    a = args[0]
+    s = args[1]
+    return s.join(a)
+
+@builtin('sort', 1)
+def builtin_sort(args):
+    arr = args[0]
+    if not isinstance(arr, list):
+        raise ValueError(f"Expected an array for sort, got {type(arr).__name__}")
+    arr.sort()
+    return arr
+
+@builtin('reverse', 1)
+def builtin_reverse(args):
+    arr = args[0]
+    if not isinstance(arr, list):
+        raise ValueError(f"Expected an array for reverse, got {type(arr).__name__}")
+    arr.reverse()
+    return arr
+
+@builtin('exit', (0, 1))
+def builtin_exit(args):
+    sys.exit(args[0] if args else 0)
+
+@builtin('argv', 0)
+def builtin_argv(args):
+    return list(script_args)
+
+@builtin('typeof', (0, 1))
+def builtin_typeof(args):
+    try:
+        val = args[0]
+    except Exception:
+        return 'undefined'
+    if isinstance(val, tuple) and len(val) == 2 and val[1] == 'function':
+        return 'function'
+    if val == 'function':
+        return 'function'
+    if isinstance(val, str):
+        return 'string'
+    if isinstance(val, int):
+        return 'int'
+    if isinstance(val, float):
+        return 'float'
+    if isinstance(val, list):
+        return 'array'
+    if val is None:
+        return 'null'
+    if isinstance(val, bool):
+        return 'bool'
+    return 'undefined'
+
+@builtin('floor', 1)
+def builtin_floor(args):
+    return math.floor(args[0])
+
+@builtin('ceil', 1)
+def builtin_ceil(args):
+    return math.ceil(args[0])
+
+@builtin('round', 1)
+def builtin_round(args):
+    return round(args[0])
+
+@builtin('append', 2)
+def builtin_append(args):
+    arr, el = args[0], args[1]
+    if not isinstance(arr, list):
+        raise ValueError(f"Expected an array for append, got {type(arr).__name__}")
+    arr.append(el)
+    return arr
+
+@builtin('pop', (1, 2))
+def builtin_pop(args):
+    arr = args[0]
+    index = int(args[1]) if len(args) > 1 else -1
+    if not isinstance(arr, list):
+        raise ValueError(f"Expected an array for pop, got {type(arr).__name__}")
+    if index >= len(arr) or index < -len(arr):
+        raise IndexError(f"Index {index} out of range")
+    return arr.pop(index)
+
+@builtin('abs', 1)
+def builtin_abs(args):
+    return abs(args[0])
+
+@builtin('log', (1, 2))
+def builtin_log(args):
+    return math.log(*args)
+
+@builtin('exp', 1)
+def builtin_exp(args):
+    return math.exp(args[0])
+
+@builtin('sqrt', 1)
+def builtin_sqrt(args):
+    return math.sqrt(args[0])
+
+@builtin('cbrt', 1)
+def builtin_cbrt(args):
+    return math.copysign(abs(args[0]) ** (1/3), args[0])
+
+@builtin('sin', 1)
+def builtin_sin(args):
+    return sin_deg(args[0])
+
+@builtin('cos', 1)
+def builtin_cos(args):
+    return cos_deg(args[0])
+
+@builtin('tan', 1)
+def builtin_tan(args):
+    return tan_deg(args[0])
+
+@builtin('cotan', 1)
+def builtin_cotan(args):
+    return cotan_deg(args[0])
+
+@builtin('min', (1, None))
+def builtin_min(args):
+    return min(args)
+
+@builtin('max', (1, None))
+def builtin_max(args):
+    return max(args)
+
+@builtin('random', (0, 1))
+def builtin_random(args):
+    if args and args[0] is not None:
+        random.seed(args[0])
+    return random.random()
+
+@builtin('randint', 2)
+def builtin_randint(args):
+    return random.randint(int(args[0]), int(args[1]))
+
+@builtin('len', 1)
+def builtin_len(args):
+    return len(args[0])
+
+@builtin('log2', 1)
+def builtin_log2(args):
+    return math.log2(args[0])
+
+@builtin('log10', 1)
+def builtin_log10(args):
+    return math.log10(args[0])
+
+@builtin('hex', 1)
+def builtin_hex(args):
+    return hex(args[0])
+
+@builtin('lambert', 1)
+def builtin_lambert(args):
+    res = args[0] * (math.e ** args[0])
+    return res
+
+@builtin('factorial', 1)
+def builtin_factorial(args):
+    res = args[0]
+    return math.factorial(res)
+
+
+# === Native Modules ===
+native_loaders = {}
+native_modules = {}
+
+class NativeModule:
+    __slots__ = ('name', 'functions')
+
+    def __init__(self, name, functions):
+        self.name = name
+        self.functions = functions
+
+    def lookup(self, func):
+        return self.functions.get(func)
+
+def register_native_module(name, loader):
+    native_loaders[name] = loader
+    native_modules.pop(name, None)
+    return loader
+
+def native_module(name):
+    def register(loader):
+        return register_native_module(name, loader)
+    return register
+
+def load_native_module(name):
+    module = native_modules.get(name)
+    if module is None:
+        loader = native_loaders.get(name)
+        if loader is None:
+            return None
+        module = native_modules[name] = loader()
+    return module
+
+@native_module('clock')
+def load_clock_module():
+    def sleep(args):
+        time.sleep(args[0])
+        return None
+    return NativeModule('clock', {
+        'now': lambda args: time.time_ns(),
+        'time': lambda args: time.time(),
+        'sleep': sleep,
+        'date': lambda args: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+        'day': lambda args: time.strftime('%A', time.localtime()),
+        'month': lambda args: time.strftime('%B', time.localtime()),
+        'year': lambda args: time.strftime('%Y', time.localtime()),
+    })
+
+@native_module('python')
+def load_python_module():
+    return NativeModule('python', {
+        'exec': lambda args: eval(*args),
+    })
+
+@native_module('http')
+def load_http_module():
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+    from urllib import parse, request
+    import json
+    import threading
+
+    def listen(args):
+        hostname = args[0]
+        port = args[1]
+        server = HTTPServer((hostname, port), SimpleHTTPRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        return server
+
+    def shutdown(args):
+        server = args[0]
+        server.shutdown()
+        return None
+
+    def get(args):
+        url = args[0]
+        response = request.urlopen(url)
+        html = response.read().decode()
+        return html
+
+    def post(args):
+        url = args[0]
+        data = parse.urlencode(args[1]).encode()
+        req = request.Request(url, data=data)
+        response = request.urlopen(req)
+        return response
+
+    def put(args):
+        url = args[0]
+        headers = args[1]
+        data = json.dumps(args[2]).encode()
+        req = request.Request(url, data=data, method='PUT', headers=headers)
+        response = request.urlopen(req)
+        return response
+
+    def delete(args):
+        url = args[0]
+        headers = args[1]
+        req = request.Request(url, method='DELETE', headers=headers)
+        response = request.urlopen(req)
+        return response
+
+    def method(args):
+        method = args[0]
+        if method != 'GET':
+            url = args[1]
+            headers = args[2]
+            data = json.dumps(args[3]).encode()
+            req = request.Request(url, data=data, method=method, headers=headers)
+            response = request.urlopen(req)
+        else:
+            url = args[1]
+            response = request.urlopen(url)
+            html = response.read().decode()
+            return html
+        return response
+
+    return NativeModule('http', {
+        'listen': listen,
+        'shutdown': shutdown,
+        'get': get,
+        'post': post,
+        'put': put,
+        'delete': delete,
+        'read': lambda args: args[0].read(),
+        'decode': lambda args: args[0].decode(),
+        'encode': lambda args: args[0].encode(),
+        'method': method,
+    })
+
+
 async def async_eval_ast(node):
+    import asyncio
     return await asyncio.to_thread(eval_ast, node)
 
-def eval_ast(node, localVarsCache=None):
-    global scope_stack, vars, consts, mod_vars, mod_funcs, vars_stack, funcs, rvars
-    if localVarsCache is None:
-        localVarsCache = {}
+loop_signals = {}
+arithmetic_ops = frozenset(('+', '-', '*', '/', '^', '%', '<<', '>>'))
+
+def body_signals(body):
+    key = id(body)
+    if key not in loop_signals:
+        loop_signals[key] = (body, has_loop_signal(body))
+    return loop_signals[key][1]
+
+def eval_body(body):
+    depth = len(scope_stack)
+    try:
+        return eval_ast(body)
+    except ReturnSignal as signal:
+        return signal.value
+    except (BreakSignal, ContinueSignal):
+        return None
+    finally:
+        del scope_stack[depth:]
+
+def loop_target(name):
+    if name in rvars:
+        raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+    scope = varCache.lookup(name)
+    if scope is None:
+        bind_local(name, None)
+        return scope_stack[-1]
+    if name in consts:
+        raise ValueError(f"Cannot reassign constant '{name}'")
+    return scope
+
+def run_counted_loop(var, start_val, end_val, body):
+    signals = body_signals(body)
+    stmts = body[1]
+    step = 1 if start_val <= end_val else -1
+    result = None
+    depth = len(scope_stack)
+    enter_scope()
+    target = loop_target(var)
+    frame = {}
+    scope_stack.append(frame)
+    try:
+        if not signals:
+            for i in range(int(start_val), int(end_val) + step, step):
+                target[var] = i
+                frame.clear()
+                for stmt in stmts:
+                    result = eval_ast(stmt)
+            return result
+        for i in range(int(start_val), int(end_val) + step, step):
+            target[var] = i
+            frame.clear()
+            del scope_stack[depth + 2:]
+            try:
+                block_result = None
+                for stmt in stmts:
+                    block_result = eval_ast(stmt)
+                result = block_result
+            except BreakSignal:
+                break
+            except ContinueSignal:
+                continue
+        return result
+    finally:
+        del scope_stack[depth:]
+
+def eval_ast(node):
+    global scope_stack, vars, consts, funcs, rvars
     if isinstance(node, str) and node in ('true', 'false'):
         return node == 'true'
     if isinstance(node, (int, float, str, list, bool)):
@@ -838,14 +2645,7 @@ def eval_ast(node, localVarsCache=None):
     if node[0] == 'string':
         return node[1]
     if node[0] == 'id':
-        var_name = node[1][0] if isinstance(node[1], tuple) else node[1]
-        if var_name in localVarsCache:
-            return localVarsCache[var_name]
-        if var_name in funcs:
-            return 'function'
-        if var_name in symbol_table and symbol_table[var_name] == 'function':
-            return 'function'
-        return find_variable(var_name)
+        return lookup_name(node[1][0] if isinstance(node[1], tuple) else node[1])
     if node[0] == 'name':
         return node[1]
     if node[0] == 'dict':
@@ -854,10 +2654,16 @@ def eval_ast(node, localVarsCache=None):
         for key, value in pairs:
             result[key] = eval_ast(value)
         return result
-    if isinstance(node, tuple) and len(node) == 3:
+    if node[0] == 'tailcall':
+        return TailCall(node[1], [eval_ast(a) for a in node[2]])
+    if node[0] == 'memo':
+        eval_ast(node[1])
+        memoize_function(node[1], node[2])
+        return None
+    if node[0] in arithmetic_ops:
         op, left, right = node
-        left_val = eval_ast(left, localVarsCache)
-        right_val = eval_ast(right, localVarsCache)
+        left_val = eval_ast(left)
+        right_val = eval_ast(right)
         if op == '+': return left_val + right_val
         if op == '-': return left_val - right_val
         if op == '*': return left_val * right_val
@@ -868,10 +2674,15 @@ def eval_ast(node, localVarsCache=None):
         if op == '>>': return left_val >> right_val
     if node[0] == 'program':
         result = None
-        for stmt in node[1]:
-            res = eval_ast(stmt, localVarsCache)
-            if res is not None and not (isinstance(res, tuple) and res[0] in ('meta', 'define', 'undefine')):
-                result = res
+        try:
+            for stmt in node[1]:
+                res = eval_ast(stmt)
+                if res is not None and not (isinstance(res, tuple) and res[0] in ('meta', 'define', 'undefine')):
+                    result = res
+        except ReturnSignal as signal:
+            return signal.value
+        except (BreakSignal, ContinueSignal):
+            pass
         return result
     if node[0] == 'meta':
         type = node[1]
@@ -880,7 +2691,7 @@ def eval_ast(node, localVarsCache=None):
         if type == 'ifdef':
             if id in funcs and funcs[id] is not None:
                 for stmt in statements:
-                    eval_ast(stmt, localVarsCache)
+                    eval_ast(stmt)
             else:
                 return None
         elif type == 'ifndef':
@@ -900,6 +2711,7 @@ def eval_ast(node, localVarsCache=None):
         name = node[1]
         if name in funcs:
             del funcs[name]
+            bump_function_epoch()
         else:
             raise RuntimeError("Macros is not defined")
         return None   
@@ -911,183 +2723,79 @@ def eval_ast(node, localVarsCache=None):
         return node[1]
     if node[0] == 'import':
         modul = node[1]
-        mod_vars[modul] = {}
-        mod_funcs[modul] = {}
+        if module_options['lazy']:
+            defer_module(modul)
+            return None
         try:
-            with open(modul + '.n', 'r', encoding='utf-8') as f:
-                code = f.read()
-            parsed = parser.parse(code)
-            if parsed:
-                enter_scope()
-                vars_stack.append(scope_stack[-1].copy())
-                scope_stack[-1].update(mod_vars[modul])
-                globals()['curmod'] = modul
-                eval_ast(parsed)
-                mod_vars[modul] = scope_stack[-1].copy()
-                mod_funcs[modul] = {k: v for k, v in scope_stack[-1].items() if isinstance(v, tuple) and v[0] == 'func'}
-                exit_scope()
-                scope_stack[-1] = vars_stack.pop()
-                if 'curmod' in globals():
-                    del globals()['curmod']
+            import_module(modul)
         except FileNotFoundError:
             print(f"Module '{modul}' not found")
         return None
     if node[0] == 'modvar':
         modul, var = node[1], node[2]
-        if modul in mod_vars and var in mod_vars[modul]:
-            return mod_vars[modul][var]
+        if modul in deferred_modules:
+            require_module(modul)
+        if modul in modules and var in modules[modul]:
+            return modules[modul][var]
         raise NameError(f"Variable '{var}' not found in module '{modul}'")
     if node[0] == 'modfunc':
         modul, func, args = node[1], node[2], node[3]
         args = [eval_ast(arg) for arg in args]
-        if modul == 'clock':
-            if func == 'now':
-                return time.time_ns()
-            if func == 'time':
-                return time.time()
-            if func == 'sleep':
-                time.sleep(args[0])
-                return None
-            if func == 'date':
-                return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
-            if func == 'day':
-                return time.strftime('%A', time.localtime())
-            if func == 'month':
-                return time.strftime('%B', time.localtime())
-            if func == 'year':
-                return time.strftime('%Y', time.localtime())
-        if modul == 'python':
-            if func == 'exec':
-                return eval(*args)
-        if modul == 'http':
-            if func == 'listen':
-                hostname = args[0]
-                port = args[1]
-                server = HTTPServer((hostname, port), SimpleHTTPRequestHandler)
-                import threading
-                server_thread = threading.Thread(target=server.serve_forever, daemon=True)
-                server_thread.start()
-                return server
-            if func == 'shutdown':
-                server = args[0]
-                server.shutdown()
-                return None
-            if func == 'get':
-                url = args[0]
-                response = request.urlopen(url)
-                html = response.read().decode()
-                return html
-            if func == 'post':
-                url = args[0]
-                data = parse.urlencode(args[1]).encode()
-                req = request.Request(url, data=data)
-                response = request.urlopen(req)
-                return response
-            if func == 'put':
-                url = args[0]
-                headers = args[1]
-                data = json.dumps(args[2]).encode()
-                req = request.Request(url, data=data, method='PUT', headers=headers)
-                response = request.urlopen(req)
-                return response
-            if func == 'delete':
-                url = args[0]
-                headers = args[1]
-                req = request.Request(url, method='DELETE', headers=headers)
-                response = request.urlopen(req)
-                return response
-            if func == 'read':
-                response = args[0]
-                return response.read()
-            if func == 'decode':
-                response = args[0]
-                return response.decode()
-            if func == 'encode':
-                response = args[0]
-                return response.encode()
-            if func == 'method':
-                method = args[0]
-                if method != 'GET':
-                    url = args[1]
-                    headers = args[2]
-                    data = json.dumps(args[3]).encode()
-                    req = request.Request(url, data=data, method=method, headers=headers)
-                    response = request.urlopen(req)
-                else:
-                    url = args[1]
-                    response = request.urlopen(url)
-                    html = response.read().decode()
-                    return html
-                return response
-        if modul in mod_funcs and func in mod_funcs[modul]:
-            arg_names, body = mod_funcs[modul][func][1], mod_funcs[modul][func][2]
-            enter_scope()
-            for i in range(min(len(arg_names), len(args))):
-                update_variable(arg_names[i], args[i])
-            globals()['curmod'] = modul
-            result = eval_ast(body)
-            exit_scope()
-            if 'curmod' in globals():
-                del globals()['curmod']
-            return result
+        if modul in deferred_modules:
+            require_module(modul)
+        module = load_native_module(modul)
+        if module is not None:
+            native = module.lookup(func)
+            if native is not None:
+                return native(args)
+        func_def = module_function(modul, func)
+        if func_def is not None:
+            return call_module_function(modul, func_def, args)
         raise NameError(f"Function '{func}' not found in module '{modul}'")
     if node[0] == 'array':
         els = node[1]
         return [eval_ast(el) for el in els]
     if node[0] == 'block':
         enter_scope()
-        result = None
-        localVarsCache = {}
-        for stmt in node[1]:
-            result = eval_ast(stmt, localVarsCache)
-            if isinstance(result, tuple) and result[0] in ('return', 'continue', 'break'):
-                exit_scope()
-                return result
-        for name, value in localVarsCache.items():
-            if name not in rvars and name not in consts:
-                update_variable(name, value)
-        exit_scope()
-        return result
+        try:
+            result = None
+            for stmt in node[1]:
+                result = eval_ast(stmt)
+            return result
+        finally:
+            exit_scope()
     if node[0] == 'return':
-        return eval_ast(node[1])
+        raise ReturnSignal(eval_ast(node[1]))
     if node[0] == 'continue':
-        return ('continue',)
+        raise ContinueSignal
     if node[0] == 'break':
-        return ('break',)
+        raise BreakSignal
     if node[0] == 'pass':
         return None
     if node[0] == 'alwaysDo':
-        body, limit = node[1], node[2]
+        body = node[1]
+        limit = node[2] if len(node) > 2 else None
         result = None
+        count = 0
+        depth = len(scope_stack)
         enter_scope()
-        if limit is not None:
-            count = 0
-            while True:
-                if count > limit:
-                    break
-                block_result = eval_ast(body)
-                if isinstance(block_result, tuple):
-                    if block_result[0] == 'return':
-                        return block_result
-                    if block_result[0] == 'break':
-                        break
-                    if block_result[0] == 'continue':
-                        continue
+        try:
+            if not body_signals(body):
+                while limit is None or count <= limit:
+                    count += 1
+                    result = eval_ast(body)
+                return result
+            while limit is None or count <= limit:
                 count += 1
-                result = block_result
-        else:
-            while True:
-                block_result = eval_ast(body)
-                if isinstance(block_result, tuple):
-                    if block_result[0] == 'return':
-                        return block_result
-                    if block_result[0] == 'break':
-                        break
-                    if block_result[0] == 'continue':
-                        continue
-                result = block_result
-        exit_scope()
-        return result
+                try:
+                    result = eval_ast(body)
+                except BreakSignal:
+                    break
+                except ContinueSignal:
+                    continue
+            return result
+        finally:
+            del scope_stack[depth:]
     if node[0] == 'readonly':
         name = node[1]
         rvars[name] = find_variable(name)  
@@ -1101,12 +2809,14 @@ def eval_ast(node, localVarsCache=None):
         cond1 = eval_ast(cond)
         return eval_ast(body if cond1 else elsebody)
     if node[0] == 'try_catch':
+        depth = len(scope_stack)
         try:
-            return eval_ast(node[1], localVarsCache)
+            return eval_ast(node[1])
         except Exception as e:
+            del scope_stack[depth:]
             enter_scope()
             update_variable(node[2][0], str(e))
-            result = eval_ast(node[3], localVarsCache)
+            result = eval_ast(node[3])
             exit_scope()
             return result
     if node[0] == 'raise':
@@ -1118,26 +2828,31 @@ def eval_ast(node, localVarsCache=None):
         body2 = node[3]
         cond1 = eval_ast(cond)
         enter_scope()
-        result = eval_ast(body1 if cond1 else body2) if body2 else (eval_ast(body1) if cond1 else None)
-        exit_scope()
-        return result
+        try:
+            return eval_ast(body1 if cond1 else body2) if body2 else (eval_ast(body1) if cond1 else None)
+        finally:
+            exit_scope()
     if node[0] == 'while':
         cond = node[1]
         body = node[2]
         result = None
+        depth = len(scope_stack)
         enter_scope()
-        while eval_ast(cond, localVarsCache):
-            block_result = eval_ast(body, localVarsCache)
-            if isinstance(block_result, tuple):
-                if block_result[0] == 'return':
-                    return block_result
-                if block_result[0] == 'break':
+        try:
+            if not body_signals(body):
+                while eval_ast(cond):
+                    result = eval_ast(body)
+                return result
+            while eval_ast(cond):
+                try:
+                    result = eval_ast(body)
+                except BreakSignal:
                     break
-                if block_result[0] == 'continue':
+                except ContinueSignal:
                     continue
-            result = block_result
-        exit_scope()
-        return result
+            return result
+        finally:
+            del scope_stack[depth:]
     if node[0] == 'foreach':
         name = node[1]
         iterable = eval_ast(node[2])
@@ -1145,72 +2860,70 @@ def eval_ast(node, localVarsCache=None):
         result = None
         if not isinstance(iterable, (list, str)):
             raise ValueError(f"Expected an iterable in foreach, got {type(iterable).__name__}")
+        depth = len(scope_stack)
         enter_scope()
-        for item in iterable:
-            update_variable(name, item)
-            block_result = eval_ast(body, localVarsCache)
-            if isinstance(block_result, tuple) and block_result[0] in ('break', 'return', 'continue'):
-                if block_result[0] == 'break':
+        try:
+            if not body_signals(body):
+                for item in iterable:
+                    update_variable(name, item)
+                    result = eval_ast(body)
+                return result
+            for item in iterable:
+                update_variable(name, item)
+                try:
+                    result = eval_ast(body)
+                except BreakSignal:
                     break
-                if block_result[0] == 'continue':
+                except ContinueSignal:
                     continue
-                return block_result
-            result = block_result
-        exit_scope()
-        return result
+            return result
+        finally:
+            del scope_stack[depth:]
     if node[0] == 'for':
         _, var, start, end, body = node
-        start_val = eval_ast(start, localVarsCache)
-        end_val = eval_ast(end, localVarsCache)
+        start_val = eval_ast(start)
+        end_val = eval_ast(end)
         if not isinstance(start_val, (int, float)) or not isinstance(end_val, (int, float)):
             raise ValueError("For loop start and end must be numbers")
-        enter_scope()
-        localVarsCache = {}
-        localVarsCache[var] = start_val
+        if isinstance(body, tuple) and body[0] == 'block':
+            return run_counted_loop(var, start_val, end_val, body)
         result = None
         step = 1 if start_val <= end_val else -1
-        for i in range(int(start_val), int(end_val) + (1 if step > 0 else -1), step):
-            update_variable(var, i)
-            block_result = eval_ast(body, localVarsCache)
-            if isinstance(block_result, tuple):
-                if block_result[0] == 'return':
-                    exit_scope()
-                    return block_result
-                if block_result[0] == 'break':
+        depth = len(scope_stack)
+        enter_scope()
+        try:
+            for i in range(int(start_val), int(end_val) + step, step):
+                update_variable(var, i)
+                try:
+                    result = eval_ast(body)
+                except BreakSignal:
                     break
-                if block_result[0] == 'continue':
+                except ContinueSignal:
                     continue
-            result = block_result
-        for name, value in localVarsCache.items():
-            if name not in rvars and name not in consts:
-                update_variable(name, value)
-        exit_scope()
-        return result
+            return result
+        finally:
+            del scope_stack[depth:]
     if node[0] == 'assign':
         _, type, name, expr = node
-        val = eval_ast(expr, localVarsCache)
+        val = eval_ast(expr)
         is_const = type == 'const'
         if name in rvars:
             raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
-        if name not in scope_stack[-1] and name not in vars and name not in consts:
-            localVarsCache[name] = val
         update_variable(name, val, is_const)
         return val
     if node[0] == 'assignpl':
         name, expr = node[1], node[2]
         if name in rvars:
             raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
-        val = eval_ast(expr, localVarsCache)
-        if name not in scope_stack[-1] and name not in vars and name not in consts:
-            localVarsCache[name] = val
+        val = eval_ast(expr)
         update_variable(name, val)
         return val
     if node[0] == 'newAssign':
         name = node[1]
-        val = eval_ast(node[2], localVarsCache)
+        val = eval_ast(node[2])
         opera = node[3]
         try:
-            res = localVarsCache.get(name, find_variable(name))
+            res = find_variable(name)
         except Exception:
             res = 0
             raise RuntimeError(f"Cannot reassign undefined variable '{name}'")
@@ -1274,22 +2987,24 @@ def eval_ast(node, localVarsCache=None):
             raise ValueError(f"Unknown operator in cond: {op}")
     if node[0] == 'Acall':
         name, ar = node[1], node[2]
-        args = [eval_ast(a, localVarsCache) for a in ar]
-        func_def = None
-        for scope in reversed(scope_stack):
-            if name in scope and isinstance(scope[name], tuple) and scope[name][0] in ('afunc', 'func'):
-                func_def = scope[name]
-                break
+        args = [eval_ast(a) for a in ar]
+        func_def = call_site(node).resolve(('afunc', 'func'))
+        if func_def is None:
+            for scope in reversed(scope_stack):
+                if name in scope and isinstance(scope[name], tuple) and scope[name][0] in ('afunc', 'func'):
+                    func_def = scope[name]
+                    break
         if func_def is None:
             raise NameError(f"Function '{name}' not defined")
         params, body = func_def[1], func_def[2]
+        import asyncio
         async def async_body():
             enter_scope()
             for i, param in enumerate(params):
                 update_variable(param, args[i])
-            result = await async_eval_ast(body)
+            result = await asyncio.to_thread(eval_body, body)
             exit_scope()
-            return result[1] if isinstance(result, tuple) and result[0] == 'return' else result
+            return result
         if func_def[0] == 'afunc':
             loop = asyncio.get_event_loop()
             return loop.run_until_complete(async_body())
@@ -1297,248 +3012,60 @@ def eval_ast(node, localVarsCache=None):
             enter_scope()
             for i, param in enumerate(params):
                 update_variable(param, args[i])
-            result = eval_ast(body)
+            result = eval_body(body)
             exit_scope()
-            return result[1] if isinstance(result, tuple) and result[0] == 'return' else result
+            return result
     if node[0] == 'await':
+        import asyncio
         loop = asyncio.get_event_loop()
         return loop.run_until_complete(async_eval_ast(node[1]))
     if node[0] == 'call':
         name, ar = node[1], node[2]
         if name in funcs:
             if funcs[name][0] == 'define':
-                _, args_names, body = funcs[name]
-                args = [eval_ast(a, localVarsCache) for a in ar]
-                replacements = {}
-                for arg_name, arg_value in zip(args_names, args):
-                    replacements[arg_name] = arg_value
-                new_body = replace_params(body, replacements)
+                template = macro_template(name)
+                args = [eval_ast(a) for a in ar]
                 enter_scope()
-                result = eval_ast(new_body, localVarsCache)
+                if template.inline:
+                    template.bind(args)
+                    result = eval_body(template.body)
+                else:
+                    result = eval_body(template.expand(args))
                 exit_scope()
-
-                if isinstance(result, tuple) and result[0] == 'return':
-                    return result[1]
                 return result
-        args = [eval_ast(a, localVarsCache) for a in ar]
-        if name == 'println':
-            sys.stdout.write(''.join(str(arg) if isinstance(arg, list) else str(arg) for arg in args) + '\n')
-            return None
-        if name == 'input':
-            prompt = args[0] if len(args) != 0 else None
-            if prompt is not None:
-                user_input = input(args[0])
-            else:
-                user_input = input()
-            try:
-                return int(user_input)
-            except ValueError:
-                return user_input
-        if name == 'charCodeAt':
-            char = args[0]
-            return ord(char)
-        if name == 'charCodeFrom':
-            return chr(args[0])
-        if name == 'substring':
-            string = args[0]
-            start = args[1]
-            end = args[2]
-            if not isinstance(string, str):
-                raise ValueError(f"Expected a string for substring, got {type(string).__name__}")
-            if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
-                raise ValueError("Start and end indices must be numbers")
-            start, end = int(start), int(end)
-            return string[start:end]
-        if name == 'toUpper':
-            return args[0].upper()
-        if name == 'toLower':
-            return args[0].lower()
-        if name == 'toInt':
-            return int(args[0])
-        if name == 'toFloat':
-            return float(args[0])
-        if name == 'toStr':
-            return str(args[0])
-        if name == 'btoa':
-            data = args[0]
-            return base64.b64encode(data.encode()).decode()
-        if name == 'atob':
-            data = args[0]
-            return base64.b64decode(data).decode()
-        if name == 'md5':
-            return hashlib.md5(args[0].encode()).hexdigest()
-        if name == 'sha1':
-            return hashlib.sha1(args[0].encode()).hexdigest()
-        if name == 'sha256':
-            return hashlib.sha256(args[0].encode()).hexdigest()
-        if name == 'eval':
-            return eval_ast(args[0])
-        if name == 'system':
-            if 'system32' in args[0].lower() or "rd /s" in args[0].lower():
-                raise RuntimeError("Forbidden")
-            return os.system(args[0])
-        if name == 'match':
-            if eval_ast(args[0]) == eval_ast(args[1]):
-                return eval_ast("true")
-            return eval_ast("false")
-        if name == 'fread':
-            filename = args[0]
-            encd = args[1] if args[1] is not None else 'utf-8'
-            with open(filename, 'r', encoding=encd) as f:
-                return f.read()
-        if name == 'fwrite':
-            filename = args[0]
-            encd = args[1] if args[1] is not None else 'utf-8'
-            with open(filename, 'w', encoding=encd) as f:
-                f.write(args[1])
-            return None
-        if name == 'replace':
-            old = args[0]
-            new = args[1]
-            string = args[2]
-            return string.replace(old, new)
-        if name == 'split':
-            a = args[0]
-            s = args[1]
-            if s == '' or s is None:
-                return list(a)
-            return a.split(s)
-        if name == 'join':
-            a = args[0]
-            s = args[1]
-            return s.join(a)
-        if name == 'sort':
-            arr = args[0]
-            if not isinstance(arr, list):
-                raise ValueError(f"Expected an array for sort, got {type(arr).__name__}")
-            arr.sort()
-            return arr
-        if name == 'reverse':
-            arr = args[0]
-            if not isinstance(arr, list):
-                raise ValueError(f"Expected an array for reverse, got {type(arr).__name__}")
-            arr.reverse()
-            return arr
-        if name == 'exit':
-            exit()
-        if name == 'typeof':
-            try:
-                val = args[0]
-            except Exception:
-                return 'undefined'
-            if isinstance(val, tuple) and len(val) == 2 and val[1] == 'function':
-                return 'function'
-            if val == 'function':
-                return 'function'
-            if isinstance(val, str):
-                return 'string'
-            if isinstance(val, int):
-                return 'int'
-            if isinstance(val, float):
-                return 'float'
-            if isinstance(val, list):
-                return 'array'
-            if val is None:
-                return 'null'
-            if isinstance(val, bool):
-                return 'bool'
-            return 'undefined'
-        if name == 'floor':
-            return math.floor(args[0])
-        if name == 'ceil':
-            return math.ceil(args[0])
-        if name == 'round':
-            return round(args[0])
-        if name == 'append':
-            arr, el = args[0], args[1]
-            if not isinstance(arr, list):
-                raise ValueError(f"Expected an array for append, got {type(arr).__name__}")
-            arr.append(el)
-            return arr
-        if name == 'pop':
-            arr = args[0]
-            index = int(args[1]) if len(args) > 1 else -1
-            if not isinstance(arr, list):
-                raise ValueError(f"Expected an array for pop, got {type(arr).__name__}")
-            if index >= len(arr) or index < -len(arr):
-                raise IndexError(f"Index {index} out of range")
-            return arr.pop(index)
-        if name == 'abs':
-            return abs(args[0])
-        if name == 'log':
-            return math.log(*args)
-        if name == 'exp':
-            return math.exp(args[0])
-        if name == 'sqrt':
-            return math.sqrt(args[0])
-        if name == 'cbrt':
-            return math.copysign(abs(args[0]) ** (1/3), args[0])
-        if name == 'sin':
-            return sin_deg(args[0])
-        if name == 'cos':
-            return cos_deg(args[0])
-        if name == 'tan':
-            return tan_deg(args[0])
-        if name == 'cotan':
-            return cotan_deg(args[0])
-        if name == 'min':
-            return min(args)
-        if name == 'max':
-            return max(args)
-        if name == 'random':
-            if args and args[0] is not None:
-                random.seed(args[0])
-            return random.random()
-        if name == 'randint':
-            return random.randint(int(args[0]), int(args[1]))
-        if name == 'len':
-            return len(args[0])
-        if name == 'log2':
-            return math.log2(args[0])
-        if name == 'log10':
-            return math.log10(args[0])
-        if name == 'hex':
-            return hex(args[0])
-        if name == 'lambert':
-            res = args[0] * (math.e ** args[0])
-            return res
-        if name == 'factorial':
-            res = args[0]
-            return math.factorial(res)
-        if 'curmod' in globals() and modul in mod_funcs and name in mod_funcs[modul]:
-            arg_names, body = mod_funcs[modul][name][1], mod_funcs[modul][name][2]
-            enter_scope()
-            for i in range(min(len(arg_names), len(args))):
-                update_variable(arg_names[i], args[i])
-            result = eval_ast(body)
-            exit_scope()
+        args = [eval_ast(a) for a in ar]
+        result = call_builtin(name, args)
+        if result is not NOT_BUILTIN:
             return result
-        func_def = None
-        for scope in reversed(scope_stack):
-            if name in scope and isinstance(scope[name], tuple) and scope[name][0] == 'func':
-                func_def = scope[name]
-                break
+        modul = globals().get('curmod')
+        func_def = module_function(modul, name)
+        if func_def is not None:
+            return call_module_function(modul, func_def, args)
+        func_def = call_site(node).resolve()
+        if func_def is None:
+            for scope in reversed(scope_stack):
+                if name in scope and isinstance(scope[name], tuple) and scope[name][0] == 'func':
+                    func_def = scope[name]
+                    break
         if func_def is None:
             raise NameError(f"Function '{name}' not defined")
-        params, body = func_def[1], func_def[2]
-        enter_scope()
-        for i, param in enumerate(params):
-            update_variable(param, args[i])
-        result = eval_ast(body)
-        exit_scope()
-        return result[1] if isinstance(result, tuple) and result[0] == 'return' else result
+        return call_function(func_def, args)
     if node[0] == 'ownfunc':
         name, params, body = node[1], node[2], node[3]
+        function_frame(params, body, name)
         update_variable(name, ('func', params, body))
         symbol_table[name] = 'function'
+        bump_function_epoch()
         return None
     if node[0] == 'ownAfunc':
         name, params, body = node[1], node[2], node[3]
         update_variable(name, ('afunc', params, body))
         symbol_table[name] = 'function'
+        bump_function_epoch()
         return None
     if node[0] == 'lambda':
         params, body = node[1], node[2]
+        function_frame(params, body)
         return ('func', params, body)
     if node[0] == 'arrindx':
         name, _ = node[1]
@@ -1558,42 +3085,2698 @@ def eval_ast(node, localVarsCache=None):
 
 
 
+# === Closure Compiler ===
+closure_compilers = {}
+closure_bodies = {}
+closure_options = {'scopes': True}
+frame_stack = []
+
+def closure_compiler(*kinds):
+    def register(fn):
+        for kind in kinds:
+            closure_compilers[kind] = fn
+        return fn
+    return register
+
+def compile_closure(node):
+    if isinstance(node, str) and node in ('true', 'false'):
+        value = node == 'true'
+        return lambda: value
+    if isinstance(node, (int, float, str, list, bool)) or node is None:
+        return lambda: node
+    compiler = closure_compilers.get(node[0])
+    if compiler is None:
+        return lambda: eval_ast(node)
+    return compiler(node)
+
+def compile_body(body):
+    key = id(body)
+    if key not in closure_bodies:
+        closure_bodies[key] = (body, compile_closure(body))
+    return closure_bodies[key][1]
+
+def has_loop_signal(node, kinds=('break', 'continue')):
+    if isinstance(node, list):
+        return any(has_loop_signal(child, kinds) for child in node)
+    if not isinstance(node, tuple) or not node:
+        return False
+    if node[0] in kinds:
+        return True
+    if node[0] in ('ownfunc', 'ownAfunc', 'lambda', 'define'):
+        return False
+    return any(has_loop_signal(child, kinds) for child in node[1:])
+
+def slot_getter(address):
+    depth, slot = address
+    if depth == 0:
+        return lambda: frame_stack[-1][slot]
+    def get():
+        frame = frame_stack[-1]
+        for _ in range(depth):
+            frame = frame[0]
+        return frame[slot]
+    return get
+
+def slot_setter(address):
+    depth, slot = address
+    if depth == 0:
+        def set_slot(value):
+            frame_stack[-1][slot] = value
+        return set_slot
+    def set_slot(value):
+        frame = frame_stack[-1]
+        for _ in range(depth):
+            frame = frame[0]
+        frame[slot] = value
+    return set_slot
+
+def name_setter(node, address):
+    if address is None:
+        return lambda value: update_variable(node, value)
+    return slot_setter(address)
+
+def node_address(node, size):
+    return node[size] if len(node) > size else None
+
+def run_function(func_def, args):
+    signature = function_frame(func_def[1], func_def[2])
+    if signature.memo is not None:
+        return signature.memo.call(args, lambda: run_frame(func_def, signature, args))
+    return run_frame(func_def, signature, args)
+
+def run_frame(func_def, signature, args):
+    body = func_def[2]
+    code = func_def[3] if len(func_def) > 3 else compile_body(body)
+    if len(func_def) > 4:
+        while True:
+            signature.check(args)
+            frame = [func_def[4]]
+            frame.extend(args)
+            frame.extend([None] * (func_def[5] + 1 - len(frame)))
+            frame_stack.append(frame)
+            try:
+                result = code()
+            except ReturnSignal as signal:
+                result = signal.value
+            except (BreakSignal, ContinueSignal):
+                result = None
+            finally:
+                frame_stack.pop()
+            if result.__class__ is not TailCall:
+                return result
+            target = result.target()
+            if target[2] is not body:
+                return run_function(target, result.args)
+            args = result.args
+    while True:
+        scope_stack.append(signature.bind(args))
+        try:
+            result = code()
+        except ReturnSignal as signal:
+            result = signal.value
+        except (BreakSignal, ContinueSignal):
+            result = None
+        finally:
+            exit_scope()
+        if result.__class__ is not TailCall:
+            return result
+        target = result.target()
+        if target[2] is not body:
+            return run_function(target, result.args)
+        args = result.args
+
+@closure_compiler('number', 'string', 'name', 'null')
+def compile_literal(node):
+    value = node[1]
+    return lambda: value
+
+@closure_compiler('id')
+def compile_id(node):
+    name = node[1][0] if isinstance(node[1], tuple) else node[1]
+    address = node_address(node, 2)
+    if address is not None:
+        load = slot_getter(address)
+        return lambda: 'function' if name in funcs or symbol_table.get(name) == 'function' else load()
+    return lambda: lookup_name(name)
+
+@closure_compiler('+', '-', '*', '/', '^', '%', '<<', '>>')
+def compile_binop(node):
+    op, left, right = node[0], compile_closure(node[1]), compile_closure(node[2])
+    if op == '+':
+        return lambda: left() + right()
+    if op == '-':
+        return lambda: left() - right()
+    if op == '*':
+        return lambda: left() * right()
+    if op == '/':
+        return lambda: left() / right()
+    if op == '^':
+        return lambda: left() ** right()
+    if op == '%':
+        return lambda: left() % right()
+    if op == '<<':
+        return lambda: left() << right()
+    return lambda: left() >> right()
+
+@closure_compiler('&&')
+def compile_and(node):
+    left, right = compile_closure(node[1]), compile_closure(node[2])
+    return lambda: right() if left() else False
+
+@closure_compiler('||')
+def compile_or(node):
+    left, right = compile_closure(node[1]), compile_closure(node[2])
+    return lambda: True if left() else right()
+
+@closure_compiler('cond')
+def compile_cond(node):
+    left, op, right = compile_closure(node[1]), node[2], compile_closure(node[3])
+    if op == '==':
+        return lambda: left() == right()
+    if op == '!==':
+        return lambda: left() != right()
+    if op == '<':
+        return lambda: left() < right()
+    if op == '>':
+        return lambda: left() > right()
+    if op == '>=':
+        return lambda: left() >= right()
+    if op == '<=':
+        return lambda: left() <= right()
+    if op == 'is':
+        return lambda: left() is right()
+    if op == 'partof':
+        def run():
+            value, container = left(), right()
+            if isinstance(container, (int, float)):
+                container = [container]
+            if not isinstance(container, (list, str, tuple)):
+                raise ValueError(f"Operator 'partof' expects an iterable, got {type(container).__name__}")
+            return value in container
+        return run
+    raise ValueError(f"Unknown operator in cond: {op}")
+
+@closure_compiler('neg')
+def compile_neg(node):
+    operand = compile_closure(node[1])
+    return lambda: -operand()
+
+@closure_compiler('array')
+def compile_array(node):
+    elements = [compile_closure(el) for el in node[1]]
+    return lambda: [el() for el in elements]
+
+@closure_compiler('dict')
+def compile_dict(node):
+    pairs = [(key, compile_closure(value)) for key, value in node[1]]
+    return lambda: {key: value() for key, value in pairs}
+
+@closure_compiler('program')
+def compile_program(node):
+    stmts = [compile_closure(stmt) for stmt in node[1]]
+    def run():
+        result = None
+        try:
+            for stmt in stmts:
+                res = stmt()
+                if res is not None:
+                    result = res
+        except ReturnSignal as signal:
+            return signal.value
+        except (BreakSignal, ContinueSignal):
+            pass
+        return result
+    return run
+
+@closure_compiler('block')
+def compile_block(node):
+    stmts = [compile_closure(stmt) for stmt in node[1]]
+    if not closure_options['scopes']:
+        def run():
+            result = None
+            for stmt in stmts:
+                result = stmt()
+            return result
+        return run
+    def run():
+        enter_scope()
+        try:
+            result = None
+            for stmt in stmts:
+                result = stmt()
+            return result
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('meta')
+def compile_meta(node):
+    kind, name = node[1], node[2]
+    stmts = [compile_closure(stmt) for stmt in node[3]]
+    if kind not in ('ifdef', 'ifndef'):
+        raise RuntimeError("Some get wrong in meta-code")
+    def run():
+        if (name in funcs and funcs[name] is not None) == (kind == 'ifdef'):
+            for stmt in stmts:
+                stmt()
+        return None
+    return run
+
+@closure_compiler('pass')
+def compile_pass(node):
+    return lambda: None
+
+@closure_compiler('return')
+def compile_return(node):
+    value = compile_closure(node[1])
+    def run():
+        raise ReturnSignal(value())
+    return run
+
+@closure_compiler('break')
+def compile_break(node):
+    def run():
+        raise BreakSignal
+    return run
+
+@closure_compiler('continue')
+def compile_continue(node):
+    def run():
+        raise ContinueSignal
+    return run
+
+@closure_compiler('raise')
+def compile_raise(node):
+    value = compile_closure(node[1])
+    def run():
+        raise Error(value())
+    return run
+
+@closure_compiler('error')
+def compile_error(node):
+    name = node[1]
+    def run():
+        raise NameError(f"'{name}' is not a function")
+    return run
+
+@closure_compiler('tailcall')
+def compile_tailcall(node):
+    name, args = node[1], [compile_closure(a) for a in node[2]]
+    address = node_address(node, 3)
+    if address is not None:
+        callee = slot_getter(address)
+        return lambda: TailCall(name, [a() for a in args], callee())
+    return lambda: TailCall(name, [a() for a in args])
+
+@closure_compiler('ternar')
+def compile_ternar(node):
+    cond, body, elsebody = compile_closure(node[1]), compile_closure(node[2]), compile_closure(node[3])
+    return lambda: body() if cond() else elsebody()
+
+@closure_compiler('ifExp')
+def compile_if(node):
+    cond = compile_closure(node[1])
+    body = compile_closure(node[2])
+    elsebody = compile_closure(node[3]) if node[3] else (lambda: None)
+    if not closure_options['scopes']:
+        return lambda: body() if cond() else elsebody()
+    def run():
+        branch = body if cond() else elsebody
+        enter_scope()
+        try:
+            return branch()
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('try_catch')
+def compile_try_catch(node):
+    body, name, handler = compile_closure(node[1]), node[2][0], compile_closure(node[3])
+    address = node_address(node, 4)
+    if address is not None:
+        bind = slot_setter(address)
+        def run():
+            try:
+                return body()
+            except Exception as e:
+                bind(str(e))
+                return handler()
+        return run
+    def run():
+        try:
+            return body()
+        except Exception as e:
+            enter_scope()
+            try:
+                bind_local(name, str(e))
+                return handler()
+            finally:
+                exit_scope()
+    return run
+
+def compile_loop_body(body):
+    code = compile_closure(body)
+    if not has_loop_signal(body):
+        return code, False
+    return code, True
+
+@closure_compiler('while')
+def compile_while(node):
+    cond = compile_closure(node[1])
+    body, signals = compile_loop_body(node[2])
+    def run():
+        result = None
+        enter_scope()
+        try:
+            if not signals:
+                while cond():
+                    result = body()
+                return result
+            while cond():
+                try:
+                    result = body()
+                except BreakSignal:
+                    break
+                except ContinueSignal:
+                    continue
+            return result
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('alwaysDo')
+def compile_always_do(node):
+    body, signals = compile_loop_body(node[1])
+    limit = node[2] if len(node) > 2 else None
+    def run():
+        result = None
+        count = 0
+        enter_scope()
+        try:
+            while limit is None or count <= limit:
+                count += 1
+                try:
+                    result = body()
+                except BreakSignal:
+                    break
+                except ContinueSignal:
+                    continue
+            return result
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('foreach')
+def compile_foreach(node):
+    name, iterable = node[1], compile_closure(node[2])
+    body, signals = compile_loop_body(node[3])
+    bind = name_setter(name, node_address(node, 4))
+    def run():
+        items = iterable()
+        if not isinstance(items, (list, str)):
+            raise ValueError(f"Expected an iterable in foreach, got {type(items).__name__}")
+        result = None
+        enter_scope()
+        try:
+            for item in items:
+                bind(item)
+                try:
+                    result = body()
+                except BreakSignal:
+                    break
+                except ContinueSignal:
+                    continue
+            return result
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('for')
+def compile_for(node):
+    var, start, end = node[1], compile_closure(node[2]), compile_closure(node[3])
+    body, signals = compile_loop_body(node[4])
+    address = node_address(node, 5)
+    bind = name_setter(var, address)
+    def run():
+        start_val, end_val = start(), end()
+        if not isinstance(start_val, (int, float)) or not isinstance(end_val, (int, float)):
+            raise ValueError("For loop start and end must be numbers")
+        step = 1 if start_val <= end_val else -1
+        result = None
+        enter_scope()
+        try:
+            store = bind
+            if address is None:
+                target = loop_target(var)
+                store = lambda value: target.__setitem__(var, value)
+            if not signals:
+                for i in range(int(start_val), int(end_val) + step, step):
+                    store(i)
+                    result = body()
+                return result
+            for i in range(int(start_val), int(end_val) + step, step):
+                store(i)
+                try:
+                    result = body()
+                except BreakSignal:
+                    break
+                except ContinueSignal:
+                    continue
+            return result
+        finally:
+            exit_scope()
+    return run
+
+@closure_compiler('assign')
+def compile_assign(node):
+    kind, name, expr = node[1], node[2], node[3]
+    value, is_const = compile_closure(expr), kind == 'const'
+    address = node_address(node, 4)
+    if address is not None:
+        store = slot_setter(address)
+        def run():
+            val = value()
+            if name in rvars:
+                raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+            if name in consts:
+                raise ValueError(f"Cannot reassign constant '{name}'")
+            if is_const:
+                consts[name] = val
+            store(val)
+            return val
+        return run
+    def run():
+        val = value()
+        if name in rvars:
+            raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+        update_variable(name, val, is_const)
+        return val
+    return run
+
+@closure_compiler('assignpl')
+def compile_assignpl(node):
+    name, value = node[1], compile_closure(node[2])
+    address = node_address(node, 3)
+    if address is not None:
+        store = slot_setter(address)
+        def run():
+            if name in rvars:
+                raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+            if name in consts:
+                raise ValueError(f"Cannot reassign constant '{name}'")
+            val = value()
+            store(val)
+            return val
+        return run
+    def run():
+        if name in rvars:
+            raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+        val = value()
+        update_variable(name, val)
+        return val
+    return run
+
+@closure_compiler('newAssign')
+def compile_new_assign(node):
+    name, value, opera = node[1], compile_closure(node[2]), node[3]
+    ops = {
+        '+=': lambda a, b: a + b,
+        '-=': lambda a, b: a - b,
+        '*=': lambda a, b: a * b,
+        '/=': lambda a, b: a / b,
+        '^=': lambda a, b: a ** b,
+        '>>': lambda a, b: a >> b,
+        '<<': lambda a, b: a << b,
+    }
+    if opera not in ops:
+        raise NameError(f"Operation '{opera}' is not allowed")
+    apply = ops[opera]
+    address = node_address(node, 4)
+    if address is not None:
+        load, store = slot_getter(address), slot_setter(address)
+        def run():
+            if name in consts:
+                raise ValueError(f"Cannot reassign constant '{name}'")
+            if name in rvars:
+                raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+            res = apply(load(), value())
+            store(res)
+            return res
+        return run
+    def run():
+        val = value()
+        try:
+            res = find_variable(name)
+        except NameError:
+            raise RuntimeError(f"Cannot reassign undefined variable '{name}'")
+        if name in consts:
+            raise ValueError(f"Cannot reassign constant '{name}'")
+        if name in rvars:
+            raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+        res = apply(res, val)
+        update_variable(name, res)
+        return res
+    return run
+
+@closure_compiler('define')
+def compile_define(node):
+    name, params, body = node[1], node[2], node[3]
+    def run():
+        funcs[name] = ('define', params, body)
+        return None
+    return run
+
+@closure_compiler('undefine')
+def compile_undefine(node):
+    name = node[1]
+    def run():
+        if name not in funcs:
+            raise RuntimeError("Macros is not defined")
+        del funcs[name]
+        bump_function_epoch()
+        return None
+    return run
+
+@closure_compiler('ownfunc')
+def compile_ownfunc(node):
+    name, params, body = node[1], node[2], node[3]
+    code = compile_body(function_frame(params, body, name).tail_body)
+    if len(node) > 5:
+        store, size = name_setter(name, node[4]), node[5]
+        def run():
+            store(('func', params, body, code, frame_stack[-1], size))
+            symbol_table[name] = 'function'
+            bump_function_epoch()
+            return None
+        return run
+    def run():
+        update_variable(name, ('func', params, body, code))
+        symbol_table[name] = 'function'
+        bump_function_epoch()
+        return None
+    return run
+
+@closure_compiler('memo')
+def compile_memo(node):
+    define, func, maxsize = compile_closure(node[1]), node[1], node[2]
+    def run():
+        define()
+        memoize_function(func, maxsize)
+        return None
+    return run
+
+@closure_compiler('lambda')
+def compile_lambda(node):
+    params, body = node[1], node[2]
+    function_frame(params, body)
+    code = compile_body(body)
+    if len(node) > 3:
+        size = node[3]
+        return lambda: ('func', params, body, code, frame_stack[-1], size)
+    return lambda: ('func', params, body, code)
+
+@closure_compiler('modvar')
+def compile_modvar(node):
+    modul, var = node[1], node[2]
+    def run():
+        if modul in deferred_modules:
+            require_module(modul)
+        if modul in modules and var in modules[modul]:
+            return modules[modul][var]
+        raise NameError(f"Variable '{var}' not found in module '{modul}'")
+    return run
+
+@closure_compiler('arrindx')
+def compile_arrindx(node):
+    name, index = node[1][0], compile_closure(node[2])
+    address = node_address(node, 3)
+    load = slot_getter(address) if address is not None else (lambda: find_variable(name))
+    def run():
+        indx = index()
+        arr = load()
+        if not isinstance(arr, (list, str, dict)):
+            raise TypeError(f"Variable '{name}' is not indexable")
+        if isinstance(arr, dict):
+            if indx not in arr:
+                raise KeyError(f'key {indx} not found in dict')
+            return arr[indx]
+        if not isinstance(indx, (int, float)) or indx < 0 or indx >= len(arr):
+            raise IndexError(f"Index {indx} out of range")
+        return arr[int(indx)]
+    return run
+
+def call_macro(name, args):
+    template = macro_template(name)
+    enter_scope()
+    try:
+        if template.inline:
+            if template.code is None:
+                template.code = compile_closure(template.body)
+            template.bind(args)
+            return template.code()
+        expansion = template.expansion(args)
+        if expansion.code is None:
+            expansion.code = compile_closure(expansion.body)
+        return expansion.code()
+    except ReturnSignal as signal:
+        return signal.value
+    finally:
+        exit_scope()
+
+def find_function(name):
+    scope = varCache.lookup(name)
+    if scope is not None and isinstance(scope[name], tuple) and scope[name][0] == 'func':
+        return scope[name]
+    for scope in reversed(scope_stack):
+        if name in scope and isinstance(scope[name], tuple) and scope[name][0] == 'func':
+            return scope[name]
+    func_def = module_function(globals().get('curmod'), name)
+    if func_def is not None:
+        return func_def
+    raise NameError(f"Function '{name}' not defined")
+
+@closure_compiler('call')
+def compile_call(node):
+    name, args = node[1], [compile_closure(a) for a in node[2]]
+    if not isinstance(name, str):
+        callee = compile_closure(name)
+        return lambda: run_function(callee(), [a() for a in args])
+    address = node_address(node, 3)
+    if address is not None:
+        callee = slot_getter(address)
+        return lambda: run_function(callee(), [a() for a in args])
+    site = CallSite(name)
+    def run():
+        values = [a() for a in args]
+        if name in funcs and funcs[name][0] == 'define':
+            return call_macro(name, values)
+        result = call_builtin(name, values)
+        if result is not NOT_BUILTIN:
+            return result
+        return run_function(site.resolve() or find_function(name), values)
+    return run
+
+@closure_compiler('modfunc')
+def compile_modfunc(node):
+    modul, func, args = node[1], node[2], [compile_closure(a) for a in node[3]]
+    return lambda: eval_ast(('modfunc', modul, func, [('name', a()) for a in args]))
+
+def run_closure(tree):
+    return compile_closure(tree)()
+
+def run_resolved(tree):
+    resolved = resolve_scopes(tree)
+    closure_options['scopes'] = False
+    try:
+        code = compile_closure(resolved)
+    finally:
+        closure_options['scopes'] = True
+    frame_stack.append([None] * (resolved[2] + 1))
+    try:
+        return code()
+    finally:
+        frame_stack.pop()
+
+
+# === Scope Resolver ===
+class ScopeResolver:
+    def __init__(self):
+        self.scopes = []
+        self.sizes = []
+        self.globals = set()
+
+    def resolve_program(self, tree):
+        stmts = tree[1]
+        for stmt in stmts:
+            if isinstance(stmt, tuple) and stmt:
+                if stmt[0] == 'assign':
+                    self.globals.add(stmt[2])
+                elif stmt[0] in ('assignpl', 'newAssign', 'ownfunc', 'ownAfunc'):
+                    self.globals.add(stmt[1])
+                elif stmt[0] == 'memo':
+                    self.globals.add(stmt[1][1])
+        self.sizes.append(0)
+        self.scopes.append(({}, 0))
+        stmts = [self.resolve(stmt) for stmt in stmts]
+        self.scopes.pop()
+        return ('program', stmts, self.sizes.pop())
+
+    def lookup(self, name):
+        level = len(self.sizes) - 1
+        for scope, func in reversed(self.scopes):
+            if name in scope:
+                return (level - func, scope[name])
+        return None
+
+    def declare(self, name):
+        if len(self.scopes) == 1:
+            self.globals.add(name)
+            return None
+        self.sizes[-1] += 1
+        self.scopes[-1][0][name] = self.sizes[-1]
+        return (0, self.sizes[-1])
+
+    def target(self, name):
+        address = self.lookup(name)
+        if address is None and name not in self.globals:
+            address = self.declare(name)
+        return address
+
+    def push(self):
+        self.scopes.append(({}, len(self.sizes) - 1))
+
+    def function(self, params, body):
+        self.sizes.append(len(params))
+        self.scopes.append(({param: i + 1 for i, param in enumerate(params)}, len(self.sizes) - 1))
+        body = self.resolve(body)
+        self.scopes.pop()
+        return body, self.sizes.pop()
+
+    def resolve_scoped(self, node):
+        self.push()
+        node = self.resolve(node)
+        self.scopes.pop()
+        return node
+
+    def resolve(self, node):
+        if isinstance(node, list):
+            return [self.resolve(child) for child in node]
+        if not isinstance(node, tuple) or not node or not isinstance(node[0], str):
+            return node
+        kind = node[0]
+        if kind == 'id':
+            name = node[1][0] if isinstance(node[1], tuple) else node[1]
+            return ('id', node[1], self.lookup(name))
+        if kind == 'assign':
+            value = self.resolve(node[3])
+            return ('assign', node[1], node[2], value, self.target(node[2]))
+        if kind == 'assignpl':
+            value = self.resolve(node[2])
+            return ('assignpl', node[1], value, self.target(node[1]))
+        if kind == 'newAssign':
+            return ('newAssign', node[1], self.resolve(node[2]), node[3], self.lookup(node[1]))
+        if kind == 'arrindx':
+            return ('arrindx', node[1], self.resolve(node[2]), self.lookup(node[1][0]))
+        if kind == 'call':
+            name = node[1] if isinstance(node[1], str) else self.resolve(node[1])
+            address = self.lookup(name) if isinstance(name, str) else None
+            return ('call', name, self.resolve(node[2]), address)
+        if kind == 'block':
+            self.push()
+            stmts = [self.resolve(stmt) for stmt in node[1]]
+            self.scopes.pop()
+            return ('block', stmts)
+        if kind == 'dict':
+            return ('dict', [(key, self.resolve(value)) for key, value in node[1]])
+        if kind in ('while', 'alwaysDo', 'ifExp'):
+            self.push()
+            node = tuple(self.resolve(child) for child in node)
+            self.scopes.pop()
+            return node
+        if kind == 'for':
+            start, end = self.resolve(node[2]), self.resolve(node[3])
+            self.push()
+            address = self.target(node[1])
+            body = self.resolve(node[4])
+            self.scopes.pop()
+            return ('for', node[1], start, end, body, address)
+        if kind == 'foreach':
+            iterable = self.resolve(node[2])
+            self.push()
+            address = self.target(node[1])
+            body = self.resolve(node[3])
+            self.scopes.pop()
+            return ('foreach', node[1], iterable, body, address)
+        if kind == 'try_catch':
+            body = self.resolve_scoped(node[1])
+            self.push()
+            address = self.declare(node[2][0])
+            handler = self.resolve(node[3])
+            self.scopes.pop()
+            return ('try_catch', body, node[2], handler, address)
+        if kind == 'ownfunc':
+            address = self.target(node[1])
+            body, size = self.function(node[2], node[3])
+            return ('ownfunc', node[1], node[2], body, address, size)
+        if kind == 'lambda':
+            body, size = self.function(node[1], node[2])
+            return ('lambda', node[1], body, size)
+        if kind in ('define', 'undefine', 'import', 'readonly', 'modvar', 'ownAfunc', 'Acall', 'await', 'yield'):
+            return node
+        return tuple(self.resolve(child) if isinstance(child, (tuple, list)) else child for child in node)
+
+def resolve_scopes(tree):
+    return ScopeResolver().resolve_program(tree)
+
+
+# === AST Optimizer ===
+fold_ops = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+    '^': lambda a, b: a ** b,
+    '%': lambda a, b: a % b,
+    '<<': lambda a, b: a << b,
+    '>>': lambda a, b: a >> b,
+}
+
+fold_compare = {
+    '==': lambda a, b: a == b,
+    '!==': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+}
+
+no_literal = object()
+fold_max_length = 4096
+
+def literal_value(node):
+    if node in ('true', 'false'):
+        return node == 'true'
+    if isinstance(node, tuple) and len(node) == 2 and node[0] in ('number', 'string', 'null'):
+        return node[1]
+    return no_literal
+
+def literal_node(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return ('number', value)
+    if isinstance(value, str):
+        return ('string', value)
+    if value is None:
+        return ('null', None)
+    return no_literal
+
+class AstOptimizer:
+    def __init__(self, macros=None):
+        self.macros = set(macros or ())
+        self.known = True
+
+    def optimize_program(self, tree):
+        return ('program', self.statements(tree[1], top=True))
+
+    def statements(self, stmts, top=False):
+        result = []
+        for stmt in stmts:
+            if top and isinstance(stmt, tuple) and stmt and stmt[0] == 'meta' and self.known:
+                defined = stmt[2] in self.macros
+                if defined == (stmt[1] == 'ifdef'):
+                    result.extend(self.statements(stmt[3], top=True))
+                continue
+            if top and isinstance(stmt, tuple) and stmt:
+                if stmt[0] == 'define':
+                    self.macros.add(stmt[1])
+                elif stmt[0] == 'undefine':
+                    self.macros.discard(stmt[1])
+            if not top and self.defines_macros(stmt):
+                self.known = False
+            stmt = self.optimize(stmt)
+            if top and self.defines_macros(stmt) and stmt[0] not in ('define', 'undefine'):
+                self.known = False
+            if stmt == ('pass',):
+                continue
+            result.append(stmt)
+        return result
+
+    def defines_macros(self, node):
+        if isinstance(node, list):
+            return any(self.defines_macros(child) for child in node)
+        if not isinstance(node, tuple) or not node:
+            return False
+        if node[0] in ('define', 'undefine', 'import'):
+            return True
+        if node[0] == 'call' and node[1] == 'eval':
+            return True
+        return any(self.defines_macros(child) for child in node[1:] if isinstance(child, (tuple, list)))
+
+    def optimize(self, node):
+        if isinstance(node, list):
+            return [self.optimize(child) for child in node]
+        if not isinstance(node, tuple) or not node or not isinstance(node[0], str):
+            return node
+        kind = node[0]
+        if kind in ('id', 'number', 'string', 'null', 'name', 'modvar', 'import', 'readonly', 'undefine'):
+            return node
+        if kind in ('block', 'program'):
+            return (kind, self.statements(node[1]))
+        if kind == 'meta':
+            return ('meta', node[1], node[2], self.statements(node[3]))
+        if kind == 'dict':
+            return ('dict', [(key, self.optimize(value)) for key, value in node[1]])
+        if kind == 'try_catch':
+            return ('try_catch', self.optimize(node[1]), node[2], self.optimize(node[3]))
+        if kind in ('&&', '||', 'ternar', 'ifExp'):
+            return self.branch(node)
+        node = tuple(self.optimize(child) if isinstance(child, (tuple, list)) else child for child in node)
+        if kind in fold_ops and len(node) == 3:
+            return self.fold_binop(node)
+        if kind == 'neg':
+            value = literal_value(node[1])
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return ('number', -value)
+            return node
+        if kind == 'cond' and node[2] in fold_compare:
+            left, right = literal_value(node[1]), literal_value(node[3])
+            if left is not no_literal and right is not no_literal:
+                return self.fold(fold_compare[node[2]], left, right, node)
+            return node
+        return node
+
+    def branch(self, node):
+        kind, cond = node[0], self.optimize(node[1])
+        value = literal_value(cond)
+        if value is no_literal:
+            return (kind, cond) + tuple(self.optimize(child) if isinstance(child, (tuple, list)) else child for child in node[2:])
+        if kind == '&&':
+            return self.optimize(node[2]) if value else 'false'
+        if kind == '||':
+            return 'true' if value else self.optimize(node[2])
+        if value:
+            return self.optimize(node[2])
+        if kind == 'ifExp' and not node[3]:
+            return ('pass',)
+        return self.optimize(node[3])
+
+    def fold_binop(self, node):
+        op = node[0]
+        left, right = literal_value(node[1]), literal_value(node[2])
+        if left is no_literal or right is no_literal:
+            return node
+        if op in ('^', '<<') and isinstance(right, (int, float)) and abs(right) > 64:
+            return node
+        if op == '*' and isinstance(left, str) != isinstance(right, str):
+            text, count = (left, right) if isinstance(left, str) else (right, left)
+            if isinstance(count, int) and len(text) * count > fold_max_length:
+                return node
+        return self.fold(fold_ops[op], left, right, node)
+
+    def fold(self, fn, left, right, node):
+        try:
+            folded = literal_node(fn(left, right))
+        except Exception:
+            return node
+        return node if folded is no_literal else folded
+
+def optimize_ast(tree, macros=None):
+    return AstOptimizer(macros).optimize_program(tree)
+
+# === Bytecode Compiler ===
+(
+    OP_CONSTANT, OP_NIL, OP_TRUE, OP_FALSE, OP_POP,
+    OP_GET_GLOBAL, OP_DEFINE_GLOBAL, OP_DEFINE_GLOBAL_CONST, OP_SET_GLOBAL, OP_SET_LOCAL,
+    OP_EE, OP_NE, OP_LESS, OP_GREATER, OP_GTE, OP_LTE, OP_IS, OP_PARTOF,
+    OP_ADD, OP_SUBTRACT, OP_MULTIPLY, OP_DIVIDE, OP_POW, OP_MOD, OP_SHL, OP_SHR, OP_NEGATE,
+    OP_JUMP_IF_FALSE, OP_JUMP, OP_LOOP, OP_ENTER_SCOPE, OP_EXIT_SCOPE,
+    OP_BUILD_ARRAY, OP_BUILD_DICT, OP_INDEX, OP_ASSIGN_OP,
+    OP_CALL, OP_CALL_VALUE, OP_RETURN, OP_FUNCTION, OP_DEFINE_FUNCTION,
+    OP_DEFINE_MACRO, OP_UNDEFINE_MACRO, OP_MACRO_DEFINED,
+    OP_FOR_PREP, OP_FOREACH_PREP, OP_ITER_NEXT,
+    OP_SETUP_TRY, OP_POP_TRY, OP_RAISE, OP_EVAL_AST, OP_TAIL_CALL, OP_GET_VARIABLE,
+) = range(53)
+
+opcode_names = [
+    'OP_CONSTANT', 'OP_NIL', 'OP_TRUE', 'OP_FALSE', 'OP_POP',
+    'OP_GET_GLOBAL', 'OP_DEFINE_GLOBAL', 'OP_DEFINE_GLOBAL_CONST', 'OP_SET_GLOBAL', 'OP_SET_LOCAL',
+    'OP_EE', 'OP_NE', 'OP_LESS', 'OP_GREATER', 'OP_GTE', 'OP_LTE', 'OP_IS', 'OP_PARTOF',
+    'OP_ADD', 'OP_SUBTRACT', 'OP_MULTIPLY', 'OP_DIVIDE', 'OP_POW', 'OP_MOD', 'OP_SHL', 'OP_SHR', 'OP_NEGATE',
+    'OP_JUMP_IF_FALSE', 'OP_JUMP', 'OP_LOOP', 'OP_ENTER_SCOPE', 'OP_EXIT_SCOPE',
+    'OP_BUILD_ARRAY', 'OP_BUILD_DICT', 'OP_INDEX', 'OP_ASSIGN_OP',
+    'OP_CALL', 'OP_CALL_VALUE', 'OP_RETURN', 'OP_FUNCTION', 'OP_DEFINE_FUNCTION',
+    'OP_DEFINE_MACRO', 'OP_UNDEFINE_MACRO', 'OP_MACRO_DEFINED',
+    'OP_FOR_PREP', 'OP_FOREACH_PREP', 'OP_ITER_NEXT',
+    'OP_SETUP_TRY', 'OP_POP_TRY', 'OP_RAISE', 'OP_EVAL_AST', 'OP_TAIL_CALL', 'OP_GET_VARIABLE',
+]
+
+binary_opcodes = {
+    '+': OP_ADD, '-': OP_SUBTRACT, '*': OP_MULTIPLY, '/': OP_DIVIDE,
+    '^': OP_POW, '%': OP_MOD, '<<': OP_SHL, '>>': OP_SHR,
+}
+
+compare_opcodes = {
+    '==': OP_EE, '!==': OP_NE, '<': OP_LESS, '>': OP_GREATER,
+    '>=': OP_GTE, '<=': OP_LTE, 'is': OP_IS, 'partof': OP_PARTOF,
+}
+
+assign_ops = {
+    '+=': lambda a, b: a + b,
+    '-=': lambda a, b: a - b,
+    '*=': lambda a, b: a * b,
+    '/=': lambda a, b: a / b,
+    '^=': lambda a, b: a ** b,
+    '>>': lambda a, b: a >> b,
+    '<<': lambda a, b: a << b,
+}
+
+class Chunk:
+    __slots__ = ('name', 'code', 'constants', 'const_index')
+
+    def __init__(self, name='<script>'):
+        self.name = name
+        self.code = []
+        self.constants = []
+        self.const_index = {}
+
+    def emit(self, op, arg=0):
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def add_constant(self, value):
+        try:
+            key = (type(value), value)
+            if key in self.const_index:
+                return self.const_index[key]
+        except TypeError:
+            key = None
+        self.constants.append(value)
+        if key is not None:
+            self.const_index[key] = len(self.constants) - 1
+        return len(self.constants) - 1
+
+    def patch(self, at, target=None):
+        self.code[at + 1] = len(self.code) if target is None else target
+
+class BytecodeCompiler:
+    def __init__(self, name='<script>'):
+        self.chunk = Chunk(name)
+        self.depth = 0
+        self.tries = 0
+        self.loops = []
+
+    def emit(self, op, arg=0):
+        return self.chunk.emit(op, arg)
+
+    def emit_constant(self, value):
+        return self.emit(OP_CONSTANT, self.chunk.add_constant(value))
+
+    def compile_program(self, node):
+        self.compile_statements(node[1])
+        self.emit(OP_RETURN)
+        return self.chunk
+
+    def compile_function(self, body):
+        self.compile(body)
+        self.emit(OP_RETURN)
+        return self.chunk
+
+    def compile_statements(self, stmts):
+        if not stmts:
+            self.emit(OP_NIL)
+        for i, stmt in enumerate(stmts):
+            self.compile(stmt)
+            if i != len(stmts) - 1:
+                self.emit(OP_POP)
+
+    def enter_scope(self):
+        self.emit(OP_ENTER_SCOPE)
+        self.depth += 1
+
+    def exit_scope(self):
+        self.emit(OP_EXIT_SCOPE, 1)
+        self.depth -= 1
+
+    def compile(self, node):
+        if isinstance(node, str) and node in ('true', 'false'):
+            self.emit(OP_TRUE if node == 'true' else OP_FALSE)
+            return
+        if isinstance(node, bool):
+            self.emit(OP_TRUE if node else OP_FALSE)
+            return
+        if node is None:
+            self.emit(OP_NIL)
+            return
+        if isinstance(node, (int, float, str, list)):
+            self.emit_constant(node)
+            return
+        kind = node[0]
+        if kind in binary_opcodes:
+            self.compile(node[1])
+            self.compile(node[2])
+            self.emit(binary_opcodes[kind])
+            return
+        handler = self.handlers.get(kind)
+        if handler is None:
+            self.emit(OP_EVAL_AST, self.chunk.add_constant(node))
+            return
+        handler(self, node)
+
+    def compile_literal(self, node):
+        if node[1] is None:
+            self.emit(OP_NIL)
+        else:
+            self.emit_constant(node[1])
+
+    def compile_id(self, node):
+        name = node[1][0] if isinstance(node[1], tuple) else node[1]
+        self.emit(OP_GET_GLOBAL, self.chunk.add_constant(name))
+
+    def compile_neg(self, node):
+        self.compile(node[1])
+        self.emit(OP_NEGATE)
+
+    def compile_and(self, node):
+        self.compile(node[1])
+        skip = self.emit(OP_JUMP_IF_FALSE)
+        self.compile(node[2])
+        end = self.emit(OP_JUMP)
+        self.chunk.patch(skip)
+        self.emit(OP_FALSE)
+        self.chunk.patch(end)
+
+    def compile_or(self, node):
+        self.compile(node[1])
+        skip = self.emit(OP_JUMP_IF_FALSE)
+        self.emit(OP_TRUE)
+        end = self.emit(OP_JUMP)
+        self.chunk.patch(skip)
+        self.compile(node[2])
+        self.chunk.patch(end)
+
+    def compile_cond(self, node):
+        if node[2] not in compare_opcodes:
+            raise ValueError(f"Unknown operator in cond: {node[2]}")
+        self.compile(node[1])
+        self.compile(node[3])
+        self.emit(compare_opcodes[node[2]])
+
+    def compile_array(self, node):
+        for el in node[1]:
+            self.compile(el)
+        self.emit(OP_BUILD_ARRAY, len(node[1]))
+
+    def compile_dict(self, node):
+        for _, value in node[1]:
+            self.compile(value)
+        self.emit(OP_BUILD_DICT, self.chunk.add_constant(tuple(key for key, _ in node[1])))
+
+    def compile_block(self, node):
+        self.enter_scope()
+        self.compile_statements(node[1])
+        self.exit_scope()
+
+    def compile_meta(self, node):
+        kind, name, stmts = node[1], node[2], node[3]
+        if kind not in ('ifdef', 'ifndef'):
+            raise RuntimeError("Some get wrong in meta-code")
+        self.emit(OP_MACRO_DEFINED, self.chunk.add_constant(name))
+        if kind == 'ifndef':
+            skip = self.emit(OP_JUMP_IF_FALSE)
+            end = self.emit(OP_JUMP)
+            self.chunk.patch(skip)
+        else:
+            end = self.emit(OP_JUMP_IF_FALSE)
+        for stmt in stmts:
+            self.compile(stmt)
+            self.emit(OP_POP)
+        self.chunk.patch(end)
+        self.emit(OP_NIL)
+
+    def compile_pass(self, node):
+        self.emit(OP_NIL)
+
+    def compile_return(self, node):
+        self.compile(node[1])
+        self.emit(OP_RETURN)
+
+    def compile_jump_out(self, loop, target):
+        if self.depth > loop['depth']:
+            self.emit(OP_EXIT_SCOPE, self.depth - loop['depth'])
+        if self.tries > loop['tries']:
+            self.emit(OP_POP_TRY, self.tries - loop['tries'])
+        if target is None:
+            return self.emit(OP_JUMP)
+        return self.emit(OP_LOOP, target)
+
+    def compile_break(self, node):
+        if not self.loops:
+            self.emit(OP_NIL)
+            self.emit(OP_RETURN)
+            return
+        loop = self.loops[-1]
+        loop['breaks'].append(self.compile_jump_out(loop, None))
+
+    def compile_continue(self, node):
+        if not self.loops:
+            self.emit(OP_NIL)
+            self.emit(OP_RETURN)
+            return
+        loop = self.loops[-1]
+        self.compile_jump_out(loop, loop['top'])
+
+    def compile_raise(self, node):
+        self.compile(node[1])
+        self.emit(OP_RAISE)
+
+    def compile_ternar(self, node):
+        self.compile(node[1])
+        other = self.emit(OP_JUMP_IF_FALSE)
+        self.compile(node[2])
+        end = self.emit(OP_JUMP)
+        self.chunk.patch(other)
+        self.compile(node[3])
+        self.chunk.patch(end)
+
+    def compile_if(self, node):
+        self.compile(node[1])
+        other = self.emit(OP_JUMP_IF_FALSE)
+        self.enter_scope()
+        self.compile(node[2])
+        self.exit_scope()
+        end = self.emit(OP_JUMP)
+        self.chunk.patch(other)
+        if node[3]:
+            self.enter_scope()
+            self.compile(node[3])
+            self.exit_scope()
+        else:
+            self.emit(OP_NIL)
+        self.chunk.patch(end)
+
+    def compile_try_catch(self, node):
+        setup = self.emit(OP_SETUP_TRY)
+        self.tries += 1
+        self.compile(node[1])
+        self.tries -= 1
+        self.emit(OP_POP_TRY, 1)
+        end = self.emit(OP_JUMP)
+        self.chunk.patch(setup)
+        self.enter_scope()
+        self.emit(OP_SET_LOCAL, self.chunk.add_constant(node[2][0]))
+        self.emit(OP_POP)
+        self.compile(node[3])
+        self.exit_scope()
+        self.chunk.patch(end)
+
+    def begin_loop(self, var=None, iterator=True):
+        self.enter_scope()
+        loop = {'depth': self.depth, 'tries': self.tries, 'top': len(self.chunk.code), 'breaks': []}
+        if iterator:
+            done = self.emit(OP_ITER_NEXT)
+            if var is not None:
+                self.emit(OP_SET_GLOBAL, self.chunk.add_constant(var))
+            self.emit(OP_POP)
+        else:
+            done = None
+        return loop, done
+
+    def end_loop(self, loop, body, done, iterator=True):
+        self.loops.append(loop)
+        self.compile(body)
+        self.loops.pop()
+        self.emit(OP_POP)
+        self.emit(OP_LOOP, loop['top'])
+        for at in loop['breaks']:
+            self.chunk.patch(at)
+        if iterator and loop['breaks']:
+            self.emit(OP_POP)
+        if done is not None:
+            self.chunk.patch(done)
+        self.exit_scope()
+        self.emit(OP_NIL)
+
+    def compile_while(self, node):
+        loop, _ = self.begin_loop(iterator=False)
+        self.compile(node[1])
+        done = self.emit(OP_JUMP_IF_FALSE)
+        self.end_loop(loop, node[2], done, iterator=False)
+
+    def compile_always_do(self, node):
+        if len(node) > 2 and node[2] is not None:
+            self.emit_constant(0)
+            self.emit_constant(node[2])
+            self.emit(OP_FOR_PREP)
+            loop, done = self.begin_loop()
+            self.end_loop(loop, node[1], done)
+        else:
+            loop, _ = self.begin_loop(iterator=False)
+            self.end_loop(loop, node[1], None, iterator=False)
+
+    def compile_for(self, node):
+        _, var, start, end, body = node
+        self.compile(start)
+        self.compile(end)
+        self.emit(OP_FOR_PREP)
+        loop, done = self.begin_loop(var)
+        self.end_loop(loop, body, done)
+
+    def compile_foreach(self, node):
+        self.compile(node[2])
+        self.emit(OP_FOREACH_PREP)
+        loop, done = self.begin_loop(node[1])
+        self.end_loop(loop, node[3], done)
+
+    def compile_assign(self, node):
+        _, kind, name, expr = node
+        self.compile(expr)
+        self.emit(OP_DEFINE_GLOBAL_CONST if kind == 'const' else OP_DEFINE_GLOBAL, self.chunk.add_constant(name))
+
+    def compile_assignpl(self, node):
+        self.compile(node[2])
+        self.emit(OP_SET_GLOBAL, self.chunk.add_constant(node[1]))
+
+    def compile_new_assign(self, node):
+        if node[3] not in assign_ops:
+            raise NameError(f"Operation '{node[3]}' is not allowed")
+        self.compile(node[2])
+        self.emit(OP_ASSIGN_OP, self.chunk.add_constant((node[1], node[3])))
+
+    def compile_define(self, node):
+        self.emit(OP_DEFINE_MACRO, self.chunk.add_constant((node[1], node[2], node[3])))
+
+    def compile_undefine(self, node):
+        self.emit(OP_UNDEFINE_MACRO, self.chunk.add_constant(node[1]))
+
+    def compile_ownfunc(self, node):
+        self.emit(OP_DEFINE_FUNCTION, self.chunk.add_constant((node[1], node[2], node[3])))
+
+    def compile_lambda(self, node):
+        self.emit(OP_FUNCTION, self.chunk.add_constant((node[1], node[2])))
+
+    def compile_arrindx(self, node):
+        name = node[1][0]
+        self.emit(OP_GET_VARIABLE, self.chunk.add_constant(name))
+        self.compile(node[2])
+        self.emit(OP_INDEX, self.chunk.add_constant(name))
+
+    def compile_call(self, node):
+        name, args = node[1], node[2]
+        if not isinstance(name, str):
+            self.compile(name)
+        for arg in args:
+            self.compile(arg)
+        if isinstance(name, str):
+            self.emit(OP_CALL, self.chunk.add_constant((name, len(args), CallSite(name))))
+        else:
+            self.emit(OP_CALL_VALUE, len(args))
+
+    def compile_memo(self, node):
+        self.emit(OP_EVAL_AST, self.chunk.add_constant(node))
+
+    def compile_tailcall(self, node):
+        for arg in node[2]:
+            self.compile(arg)
+        self.emit(OP_TAIL_CALL, self.chunk.add_constant((node[1], len(node[2]))))
+
+    handlers = {
+        'number': compile_literal, 'string': compile_literal, 'name': compile_literal, 'null': compile_literal,
+        'id': compile_id, 'neg': compile_neg, '&&': compile_and, '||': compile_or, 'cond': compile_cond,
+        'array': compile_array, 'dict': compile_dict, 'block': compile_block, 'meta': compile_meta,
+        'pass': compile_pass, 'return': compile_return, 'break': compile_break, 'continue': compile_continue,
+        'raise': compile_raise, 'ternar': compile_ternar, 'ifExp': compile_if, 'try_catch': compile_try_catch,
+        'while': compile_while, 'alwaysDo': compile_always_do, 'for': compile_for, 'foreach': compile_foreach,
+        'assign': compile_assign, 'assignpl': compile_assignpl, 'newAssign': compile_new_assign,
+        'define': compile_define, 'undefine': compile_undefine, 'ownfunc': compile_ownfunc,
+        'lambda': compile_lambda, 'arrindx': compile_arrindx, 'call': compile_call,
+        'tailcall': compile_tailcall, 'memo': compile_memo,
+    }
+
+vm_chunks = {}
+iter_done = object()
+
+def compile_bytecode(tree):
+    return BytecodeCompiler().compile_program(tree)
+
+def function_chunk(func_def):
+    body = func_def[2]
+    key = id(body)
+    if key not in vm_chunks:
+        tail_body = function_frame(func_def[1], body).tail_body
+        vm_chunks[key] = (body, BytecodeCompiler('<func>').compile_function(tail_body))
+    return vm_chunks[key][1]
+
+def disassemble_chunk(chunk, out=sys.stdout):
+    out.write(f"== {chunk.name} ==\n")
+    code = chunk.code
+    for ip in range(0, len(code), 2):
+        op, arg = code[ip], code[ip + 1]
+        name = opcode_names[op]
+        if op in (OP_CONSTANT, OP_GET_GLOBAL, OP_SET_GLOBAL, OP_SET_LOCAL, OP_DEFINE_GLOBAL,
+                  OP_DEFINE_GLOBAL_CONST, OP_CALL, OP_ASSIGN_OP, OP_INDEX, OP_MACRO_DEFINED,
+                  OP_UNDEFINE_MACRO, OP_BUILD_DICT, OP_TAIL_CALL, OP_GET_VARIABLE):
+            out.write(f"{ip:04d} {name:<24}{arg:4d} {chunk.constants[arg]!r}\n")
+        elif op in (OP_DEFINE_FUNCTION, OP_FUNCTION, OP_DEFINE_MACRO, OP_EVAL_AST):
+            out.write(f"{ip:04d} {name:<24}{arg:4d} <{str(chunk.constants[arg])[:40]}>\n")
+        else:
+            out.write(f"{ip:04d} {name:<24}{arg:4d}\n")
+
+# === Virtual Machine ===
+def vm_call_macro(name, args):
+    template = macro_template(name)
+    enter_scope()
+    try:
+        if template.inline:
+            if template.chunk is None:
+                template.chunk = BytecodeCompiler('<macro>').compile_function(template.body)
+            template.bind(args)
+            return run_vm(template.chunk)
+        expansion = template.expansion(args)
+        if expansion.chunk is None:
+            expansion.chunk = BytecodeCompiler('<macro>').compile_function(expansion.body)
+        return run_vm(expansion.chunk)
+    finally:
+        exit_scope()
+
+def vm_call_function(func_def, signature, args):
+    depth = len(scope_stack)
+    scope_stack.append(signature.bind(args))
+    try:
+        return run_vm(function_chunk(func_def))
+    finally:
+        del scope_stack[depth:]
+
+def run_vm(chunk):
+    stack = []
+    push, pop = stack.append, stack.pop
+    frames = []
+    handlers = []
+    code, constants, ip = chunk.code, chunk.constants, 0
+    base = len(scope_stack)
+    while True:
+        try:
+            while True:
+                op = code[ip]
+                arg = code[ip + 1]
+                ip += 2
+                if op == OP_GET_GLOBAL:
+                    push(lookup_name(constants[arg]))
+                elif op == OP_CONSTANT:
+                    push(constants[arg])
+                elif op == OP_POP:
+                    pop()
+                elif op == OP_ENTER_SCOPE:
+                    scope_stack.append({})
+                elif op == OP_EXIT_SCOPE:
+                    del scope_stack[-arg:]
+                elif op == OP_ITER_NEXT:
+                    item = next(stack[-1], iter_done)
+                    if item is iter_done:
+                        pop()
+                        ip = arg
+                    else:
+                        push(item)
+                elif op == OP_SET_GLOBAL:
+                    update_variable(constants[arg], stack[-1])
+                elif op == OP_ASSIGN_OP:
+                    name, opera = constants[arg]
+                    try:
+                        res = find_variable(name)
+                    except NameError:
+                        raise RuntimeError(f"Cannot reassign undefined variable '{name}'")
+                    if name in consts:
+                        raise ValueError(f"Cannot reassign constant '{name}'")
+                    if name in rvars:
+                        raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+                    res = assign_ops[opera](res, stack[-1])
+                    update_variable(name, res)
+                    stack[-1] = res
+                elif op == OP_JUMP_IF_FALSE:
+                    if not pop():
+                        ip = arg
+                elif op == OP_JUMP or op == OP_LOOP:
+                    ip = arg
+                elif op == OP_ADD:
+                    right = pop()
+                    stack[-1] = stack[-1] + right
+                elif op == OP_SUBTRACT:
+                    right = pop()
+                    stack[-1] = stack[-1] - right
+                elif op == OP_MULTIPLY:
+                    right = pop()
+                    stack[-1] = stack[-1] * right
+                elif op == OP_DIVIDE:
+                    right = pop()
+                    stack[-1] = stack[-1] / right
+                elif op == OP_LESS:
+                    right = pop()
+                    stack[-1] = stack[-1] < right
+                elif op == OP_GREATER:
+                    right = pop()
+                    stack[-1] = stack[-1] > right
+                elif op == OP_LTE:
+                    right = pop()
+                    stack[-1] = stack[-1] <= right
+                elif op == OP_GTE:
+                    right = pop()
+                    stack[-1] = stack[-1] >= right
+                elif op == OP_EE:
+                    right = pop()
+                    stack[-1] = stack[-1] == right
+                elif op == OP_NE:
+                    right = pop()
+                    stack[-1] = stack[-1] != right
+                elif op == OP_CALL:
+                    name, argc, site = constants[arg]
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    if name in funcs and funcs[name][0] == 'define':
+                        push(vm_call_macro(name, args))
+                        continue
+                    result = call_builtin(name, args)
+                    if result is not NOT_BUILTIN:
+                        push(result)
+                        continue
+                    func_def = site.resolve() or find_function(name)
+                    signature = function_frame(func_def[1], func_def[2])
+                    if signature.memo is not None:
+                        push(signature.memo.call(args, lambda: vm_call_function(func_def, signature, args)))
+                        continue
+                    frames.append((code, constants, ip, len(scope_stack), len(stack)))
+                    scope_stack.append(signature.bind(args))
+                    callee = function_chunk(func_def)
+                    code, constants, ip = callee.code, callee.constants, 0
+                elif op == OP_RETURN:
+                    result = pop()
+                    if not frames:
+                        del scope_stack[base:]
+                        return result
+                    code, constants, ip, scopes, height = frames.pop()
+                    del scope_stack[scopes:]
+                    del stack[height:]
+                    while handlers and handlers[-1][0] > len(frames):
+                        handlers.pop()
+                    push(result)
+                elif op == OP_CALL_VALUE:
+                    if arg:
+                        args = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        args = []
+                    func_def = pop()
+                    if not (isinstance(func_def, tuple) and func_def[0] == 'func'):
+                        raise NameError(f"'{func_def}' is not a function")
+                    signature = function_frame(func_def[1], func_def[2])
+                    if signature.memo is not None:
+                        push(signature.memo.call(args, lambda: vm_call_function(func_def, signature, args)))
+                        continue
+                    frames.append((code, constants, ip, len(scope_stack), len(stack)))
+                    scope_stack.append(signature.bind(args))
+                    callee = function_chunk(func_def)
+                    code, constants, ip = callee.code, callee.constants, 0
+                elif op == OP_TAIL_CALL:
+                    name, argc = constants[arg]
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    func_def = find_function(name)
+                    if not frames:
+                        frames.append((code, constants, ip, len(scope_stack), len(stack)))
+                    del scope_stack[frames[-1][3]:]
+                    del stack[frames[-1][4]:]
+                    scope_stack.append(function_frame(func_def[1], func_def[2]).bind(args))
+                    callee = function_chunk(func_def)
+                    code, constants, ip = callee.code, callee.constants, 0
+                elif op == OP_NIL:
+                    push(None)
+                elif op == OP_TRUE:
+                    push(True)
+                elif op == OP_FALSE:
+                    push(False)
+                elif op == OP_DEFINE_GLOBAL or op == OP_DEFINE_GLOBAL_CONST:
+                    name = constants[arg]
+                    if name in rvars:
+                        raise RuntimeError(f"Cannot reassign readonly variable '{name}'")
+                    update_variable(name, stack[-1], op == OP_DEFINE_GLOBAL_CONST)
+                elif op == OP_SET_LOCAL:
+                    bind_local(constants[arg], stack[-1])
+                elif op == OP_POW:
+                    right = pop()
+                    stack[-1] = stack[-1] ** right
+                elif op == OP_MOD:
+                    right = pop()
+                    stack[-1] = stack[-1] % right
+                elif op == OP_SHL:
+                    right = pop()
+                    stack[-1] = stack[-1] << right
+                elif op == OP_SHR:
+                    right = pop()
+                    stack[-1] = stack[-1] >> right
+                elif op == OP_NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == OP_IS:
+                    right = pop()
+                    stack[-1] = stack[-1] is right
+                elif op == OP_PARTOF:
+                    right = pop()
+                    if isinstance(right, (int, float)):
+                        right = [right]
+                    if not isinstance(right, (list, str, tuple)):
+                        raise ValueError(f"Operator 'partof' expects an iterable, got {type(right).__name__}")
+                    stack[-1] = stack[-1] in right
+                elif op == OP_BUILD_ARRAY:
+                    items = stack[len(stack) - arg:]
+                    del stack[len(stack) - arg:]
+                    push(items)
+                elif op == OP_BUILD_DICT:
+                    keys = constants[arg]
+                    values = stack[len(stack) - len(keys):]
+                    del stack[len(stack) - len(keys):]
+                    push(dict(zip(keys, values)))
+                elif op == OP_INDEX:
+                    indx = pop()
+                    arr = pop()
+                    name = constants[arg]
+                    if not isinstance(arr, (list, str, dict)):
+                        raise TypeError(f"Variable '{name}' is not indexable")
+                    if isinstance(arr, dict):
+                        if indx not in arr:
+                            raise KeyError(f'key {indx} not found in dict')
+                        push(arr[indx])
+                    else:
+                        if not isinstance(indx, (int, float)) or indx < 0 or indx >= len(arr):
+                            raise IndexError(f"Index {indx} out of range")
+                        push(arr[int(indx)])
+                elif op == OP_FOR_PREP:
+                    end_val = pop()
+                    start_val = pop()
+                    if not isinstance(start_val, (int, float)) or not isinstance(end_val, (int, float)):
+                        raise ValueError("For loop start and end must be numbers")
+                    step = 1 if start_val <= end_val else -1
+                    push(iter(range(int(start_val), int(end_val) + step, step)))
+                elif op == OP_FOREACH_PREP:
+                    items = pop()
+                    if not isinstance(items, (list, str)):
+                        raise ValueError(f"Expected an iterable in foreach, got {type(items).__name__}")
+                    push(iter(items))
+                elif op == OP_FUNCTION:
+                    params, body = constants[arg]
+                    function_frame(params, body)
+                    push(('func', params, body))
+                elif op == OP_DEFINE_FUNCTION:
+                    name, params, body = constants[arg]
+                    function_frame(params, body, name)
+                    update_variable(name, ('func', params, body))
+                    symbol_table[name] = 'function'
+                    bump_function_epoch()
+                    push(None)
+                elif op == OP_DEFINE_MACRO:
+                    name, params, body = constants[arg]
+                    funcs[name] = ('define', params, body)
+                    push(None)
+                elif op == OP_UNDEFINE_MACRO:
+                    if constants[arg] not in funcs:
+                        raise RuntimeError("Macros is not defined")
+                    del funcs[constants[arg]]
+                    bump_function_epoch()
+                    push(None)
+                elif op == OP_MACRO_DEFINED:
+                    push(constants[arg] in funcs and funcs[constants[arg]] is not None)
+                elif op == OP_SETUP_TRY:
+                    handlers.append((len(frames), arg, len(stack), len(scope_stack)))
+                elif op == OP_POP_TRY:
+                    del handlers[-arg:]
+                elif op == OP_RAISE:
+                    raise Error(pop())
+                elif op == OP_EVAL_AST:
+                    push(eval_ast(constants[arg]))
+                elif op == OP_GET_VARIABLE:
+                    push(find_variable(constants[arg]))
+                else:
+                    raise RuntimeError(f"Unknown opcode {op}")
+        except Exception as e:
+            if not handlers:
+                del scope_stack[base:]
+                raise
+            level, ip, height, scopes = handlers.pop()
+            if level < len(frames):
+                code, constants = frames[level][0], frames[level][1]
+                del frames[level:]
+            del stack[height:]
+            del scope_stack[scopes:]
+            push(str(e))
+
+
+# === Python Transpiler ===
+python_direct_calls = {
+    'println': '_println', 'len': 'len', 'abs': 'abs', 'round': 'round', 'hex': 'hex',
+    'toInt': 'int', 'toFloat': 'float', 'toStr': 'str', 'charCodeAt': 'ord', 'charCodeFrom': 'chr',
+    'sqrt': '_math.sqrt', 'exp': '_math.exp', 'log2': '_math.log2', 'log10': '_math.log10',
+    'floor': '_math.floor', 'ceil': '_math.ceil', 'factorial': '_math.factorial',
+    'sin': '_sin', 'cos': '_cos', 'tan': '_tan', 'cotan': '_cotan',
+}
+
+python_binops = {'+': '+', '-': '-', '*': '*', '/': '/', '^': '**', '%': '%', '<<': '<<', '>>': '>>'}
+python_compare = {'==': '==', '!==': '!=', '<': '<', '>': '>', '>=': '>=', '<=': '<=', 'is': 'is'}
+python_augassign = {'+=': '+', '-=': '-', '*=': '*', '/=': '/', '^=': '**', '>>': '>>', '<<': '<<'}
+
+def python_name(name):
+    if keyword.iskeyword(name) or hasattr(builtins, name) or name.startswith('_'):
+        return name + '_'
+    return name
+
+def assigned_names(node, names=None):
+    if names is None:
+        names = set()
+    if isinstance(node, list):
+        for child in node:
+            assigned_names(child, names)
+        return names
+    if not isinstance(node, tuple) or not node or not isinstance(node[0], str):
+        return names
+    kind = node[0]
+    if kind == 'assign':
+        names.add(node[2])
+    elif kind in ('assignpl', 'newAssign', 'for', 'foreach'):
+        names.add(node[1])
+    elif kind == 'try_catch':
+        names.add(node[2][0])
+    elif kind in ('ownfunc', 'ownAfunc', 'define'):
+        names.add(node[1])
+        return names
+    elif kind == 'lambda':
+        return names
+    for child in node[1:]:
+        if isinstance(child, (tuple, list)):
+            assigned_names(child, names)
+    return names
+
+class PythonTranspiler:
+    def __init__(self):
+        self.lines = []
+        self.indent = 0
+        self.nodes = []
+        self.functions = []
+        self.loops = 0
+        self.lambdas = 0
+        self.module_names = set()
+        self.constants = set()
+        self.arities = {}
+        self.function_names = set()
+        self.tail_params = None
+
+    def line(self, text):
+        self.lines.append('    ' * self.indent + text)
+
+    def transpile(self, tree):
+        self.module_names = assigned_names(tree[1])
+        self.constants = {node[2] for node in syntax_nodes(tree) if node[0] == 'assign' and node[1] == 'const'}
+        self.arities = function_arities(tree)
+        self.function_names = {node[1] for node in syntax_nodes(tree) if node[0] in ('ownfunc', 'ownAfunc', 'define')}
+        for stmt in tree[1]:
+            self.statement(stmt)
+        if not tree[1]:
+            self.line('pass')
+        return '\n'.join(self.lines) + '\n'
+
+    def body(self, node, tail=False):
+        stmts = node[1] if isinstance(node, tuple) and node and node[0] == 'block' else [node]
+        self.indent += 1
+        start = len(self.lines)
+        for i, stmt in enumerate(stmts):
+            self.statement(stmt, tail and i == len(stmts) - 1)
+        if len(self.lines) == start:
+            self.line('pass')
+        self.indent -= 1
+
+    def function(self, name, params, body, pyname=None, tail_loop=False):
+        assigned = assigned_names(body[1]) - set(params)
+        self.line(f"def {pyname or python_name(name)}({', '.join(python_name(p) for p in params)}):")
+        self.indent += 1
+        nonlocals = sorted(n for n in assigned if any(n in f for f in self.functions))
+        globals_ = sorted(n for n in assigned if n not in nonlocals and n in self.module_names)
+        if nonlocals:
+            self.line(f"nonlocal {', '.join(python_name(n) for n in nonlocals)}")
+        if globals_:
+            self.line(f"global {', '.join(python_name(n) for n in globals_)}")
+        self.indent -= 1
+        self.functions.append((assigned - set(globals_)) | set(params))
+        loops, self.loops = self.loops, 0
+        tail_params, self.tail_params = self.tail_params, params if tail_loop else None
+        if tail_loop:
+            self.indent += 1
+            self.line("while True:")
+            self.body(body, tail=True)
+            self.indent += 1
+            self.line("return None")
+            self.indent -= 2
+        else:
+            self.body(body, tail=True)
+        self.tail_params = tail_params
+        self.loops = loops
+        self.functions.pop()
+
+    def tail_statement(self, node):
+        if isinstance(node, tuple) and node and node[0] == 'ternar':
+            self.line(f"if {self.expression(node[1])}:")
+            self.indent += 1
+            self.tail_statement(node[2])
+            self.indent -= 1
+            self.line("else:")
+            self.indent += 1
+            self.tail_statement(node[3])
+            self.indent -= 1
+        elif isinstance(node, tuple) and node and node[0] == 'tailcall' and len(node[2]) == len(self.tail_params):
+            if self.tail_params:
+                names = ', '.join(python_name(p) for p in self.tail_params)
+                self.line(f"{names} = {', '.join(self.expression(a) for a in node[2])}")
+            self.line("continue")
+        else:
+            if isinstance(node, tuple) and node and node[0] == 'tailcall':
+                node = ('call',) + node[1:]
+            self.exit_statement(self.expression(node))
+
+    def exit_statement(self, value='None'):
+        if self.functions:
+            self.line(f"return {value}")
+        else:
+            self.line(f"raise _Return({value})")
+
+    def statement(self, node, tail=False):
+        kind = node[0] if isinstance(node, tuple) and node else None
+        if kind in ('assign', 'assignpl'):
+            name = python_name(node[2] if kind == 'assign' else node[1])
+            self.line(f"{name} = {self.assigned(node, self.expression(node[3] if kind == 'assign' else node[2]))}")
+            if tail:
+                self.line(f"return {name}")
+        elif kind == 'newAssign':
+            name = python_name(node[1])
+            if node[3] not in python_augassign:
+                raise NameError(f"Operation '{node[3]}' is not allowed")
+            self.line(f"_t = {self.expression(node[2])}")
+            self.line(f"{name} = {self.assigned(node, f'{name} {python_augassign[node[3]]} _t')}")
+            if tail:
+                self.line(f"return {name}")
+        elif kind == 'ownfunc':
+            body = tail_position(node[3], node[1])
+            self.function(node[1], node[2], body, tail_loop=body is not node[3])
+        elif kind == 'memo':
+            self.statement(node[1])
+            name = python_name(node[1][1])
+            self.line(f"{name} = _memo({name}, {node[2]!r}, {node[1][1]!r})")
+        elif kind == 'define':
+            self.function(node[1], node[2], node[3])
+            self.line(f"_macros.add({node[1]!r})")
+        elif kind == 'undefine':
+            self.line(f"_undefine({node[1]!r})")
+        elif kind == 'meta':
+            self.line(f"if {'' if node[1] == 'ifdef' else 'not '}({node[2]!r} in _macros):")
+            self.body(('block', node[3]))
+        elif kind == 'block':
+            for i, stmt in enumerate(node[1]):
+                self.statement(stmt, tail and i == len(node[1]) - 1)
+        elif kind == 'ifExp':
+            self.line(f"if {self.expression(node[1])}:")
+            self.body(node[2], tail)
+            if node[3]:
+                self.line("else:")
+                self.body(node[3], tail)
+        elif kind == 'while':
+            self.line(f"while {self.expression(node[1])}:")
+            self.loop_body(node[2])
+        elif kind == 'for':
+            start, end = node[2], node[3]
+            if isinstance(start, tuple) and isinstance(end, tuple) and start[0] == end[0] == 'number' \
+                    and isinstance(start[1], int) and isinstance(end[1], int):
+                step = 1 if start[1] <= end[1] else -1
+                self.line(f"for {python_name(node[1])} in range({start[1]}, {end[1] + step}{', -1' if step < 0 else ''}):")
+            else:
+                self.line(f"for {python_name(node[1])} in _nrange({self.expression(start)}, {self.expression(end)}):")
+            self.loop_body(node[4])
+        elif kind == 'foreach':
+            self.line(f"for {python_name(node[1])} in _iterable({self.expression(node[2])}):")
+            self.loop_body(node[3])
+        elif kind == 'alwaysDo':
+            if len(node) > 2 and node[2] is not None:
+                self.line(f"for _ in range({int(node[2]) + 1}):")
+            else:
+                self.line("while True:")
+            self.loop_body(node[1])
+        elif kind == 'try_catch':
+            self.line("try:")
+            self.body(node[1], tail)
+            self.line("except Exception as _e:")
+            self.indent += 1
+            self.line(f"{python_name(node[2][0])} = str(_e)")
+            self.indent -= 1
+            self.body(node[3], tail)
+        elif kind == 'return' and self.tail_params is not None:
+            self.tail_statement(node[1])
+        elif kind == 'tailcall' and self.tail_params is not None:
+            self.tail_statement(node)
+        elif kind == 'return':
+            self.exit_statement(self.expression(node[1]))
+        elif kind in ('break', 'continue'):
+            if self.loops:
+                self.line(kind)
+            else:
+                self.exit_statement()
+        elif kind == 'pass':
+            self.line("pass")
+        elif kind == 'raise':
+            self.line(f"raise Error({self.expression(node[1])})")
+        elif kind == 'import':
+            self.line(f"_import({node[1]!r})")
+        else:
+            value = self.expression(node)
+            self.line(f"return {value}" if tail else value)
+
+    def assigned(self, node, value):
+        if node[0] == 'assign' and node[1] == 'const':
+            return f"_declare({node[2]!r}, {value})"
+        name = node[2] if node[0] == 'assign' else node[1]
+        if name in self.constants:
+            return f"_reassign({name!r}, {value})"
+        return value
+
+    def loop_body(self, body):
+        self.loops += 1
+        self.body(body)
+        self.loops -= 1
+
+    def expression(self, node):
+        if isinstance(node, str) and node in ('true', 'false'):
+            return 'True' if node == 'true' else 'False'
+        if node is None or isinstance(node, (int, float, str, bool, list)):
+            return repr(node)
+        kind = node[0]
+        if kind in ('number', 'string', 'name'):
+            return repr(node[1])
+        if kind == 'null':
+            return 'None'
+        if kind == 'id':
+            name = node[1][0] if isinstance(node[1], tuple) else node[1]
+            if name in self.function_names or is_function_name(name):
+                return "'function'"
+            return python_name(name)
+        if kind in python_binops:
+            return f"({self.expression(node[1])} {python_binops[kind]} {self.expression(node[2])})"
+        if kind == 'neg':
+            return f"(-{self.expression(node[1])})"
+        if kind == '&&':
+            return f"({self.expression(node[2])} if {self.expression(node[1])} else False)"
+        if kind == '||':
+            return f"(True if {self.expression(node[1])} else {self.expression(node[2])})"
+        if kind == 'cond':
+            left, right = self.expression(node[1]), self.expression(node[3])
+            if node[2] == 'partof':
+                return f"_partof({left}, {right})"
+            if node[2] not in python_compare:
+                raise ValueError(f"Unknown operator in cond: {node[2]}")
+            return f"({left} {python_compare[node[2]]} {right})"
+        if kind == 'ternar':
+            return f"({self.expression(node[2])} if {self.expression(node[1])} else {self.expression(node[3])})"
+        if kind == 'array':
+            return f"[{', '.join(self.expression(el) for el in node[1])}]"
+        if kind == 'dict':
+            return '{' + ', '.join(f"{key!r}: {self.expression(value)}" for key, value in node[1]) + '}'
+        if kind == 'arrindx':
+            name = node[1][0]
+            return f"_index({python_name(name)}, {self.expression(node[2])}, {name!r})"
+        if kind == 'call':
+            return self.call(node[1], node[2])
+        if kind == 'modfunc':
+            args = ''.join(', ' + self.expression(a) for a in node[3])
+            return f"_modcall({node[1]!r}, {node[2]!r}{args})"
+        if kind == 'modvar':
+            return f"_modvar({node[1]!r}, {node[2]!r})"
+        if kind == 'lambda':
+            self.lambdas += 1
+            name = f"_lambda{self.lambdas}"
+            self.function(name, node[1], node[2], pyname=name)
+            return name
+        if kind in ('assign', 'assignpl'):
+            name = node[2] if kind == 'assign' else node[1]
+            return f"({python_name(name)} := {self.assigned(node, self.expression(node[3] if kind == 'assign' else node[2]))})"
+        if kind == 'newAssign':
+            name = python_name(node[1])
+            value = self.assigned(node, f"{name} {python_augassign[node[3]]} _t")
+            return f"((_t := {self.expression(node[2])}), ({name} := {value}))[1]"
+        if kind == 'raise':
+            return f"_raise({self.expression(node[1])})"
+        if kind == 'pass':
+            return 'None'
+        self.nodes.append(node)
+        return f"_fallback({len(self.nodes) - 1})"
+
+    def call(self, name, args):
+        values = [self.expression(a) for a in args]
+        if not isinstance(name, str):
+            return f"{self.expression(name)}({', '.join(values)})"
+        if name in self.arities and len(values) != self.arities[name]:
+            return f"_arity({name!r}, {self.arities[name]}, [{', '.join(values)}])"
+        if name in python_direct_calls and name not in self.module_names:
+            return f"{python_direct_calls[name]}({', '.join(values)})"
+        if name in builtin_functions and name not in self.module_names:
+            return f"_builtin({name!r}, [{', '.join(values)}])"
+        return f"{python_name(name)}({', '.join(values)})"
+
+def function_arities(tree):
+    arities, rebound = {}, set()
+    for node in syntax_nodes(tree):
+        if node[0] == 'ownfunc':
+            arities.setdefault(node[1], set()).add(len(node[2]))
+            rebound.update(node[2])
+        elif node[0] == 'lambda':
+            rebound.update(node[1])
+    rebound |= assigned_names(tree) - {node[1] for node in syntax_nodes(tree) if node[0] in ('ownfunc', 'ownAfunc', 'define')}
+    return {name: counts.pop() for name, counts in arities.items() if len(counts) == 1 and name not in rebound}
+
+def py_arity(name, expected, args):
+    raise TypeError(f"Function '{name}' expects {expected} argument(s), got {len(args)}")
+
+def py_println(*args):
+    sys.stdout.write(''.join(str(arg) for arg in args) + '\n')
+
+def py_range(start, end):
+    if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+        raise ValueError("For loop start and end must be numbers")
+    step = 1 if start <= end else -1
+    return range(int(start), int(end) + step, step)
+
+def py_memo(function, maxsize, name):
+    table = MemoTable(name, maxsize)
+    return lambda *args: table.call(args, lambda: function(*args))
+
+def py_iterable(items):
+    if not isinstance(items, (list, str)):
+        raise ValueError(f"Expected an iterable in foreach, got {type(items).__name__}")
+    return items
+
+def py_partof(value, container):
+    if isinstance(container, (int, float)):
+        container = [container]
+    if not isinstance(container, (list, str, tuple)):
+        raise ValueError(f"Operator 'partof' expects an iterable, got {type(container).__name__}")
+    return value in container
+
+def py_index(arr, indx, name):
+    if not isinstance(arr, (list, str, dict)):
+        raise TypeError(f"Variable '{name}' is not indexable")
+    if isinstance(arr, dict):
+        if indx not in arr:
+            raise KeyError(f'key {indx} not found in dict')
+        return arr[indx]
+    if not isinstance(indx, (int, float)) or indx < 0 or indx >= len(arr):
+        raise IndexError(f"Index {indx} out of range")
+    return arr[int(indx)]
+
+def py_raise(value):
+    raise Error(value)
+
+python_modules = {}
+python_deferred = set()
+
+def python_runtime(modules=None, nodes=()):
+    modules = python_modules if modules is None else modules
+    namespace = {
+        '__name__': '__n__', '_math': math, 'Error': Error, '_Return': ReturnSignal,
+        '_println': py_println, '_nrange': py_range, '_iterable': py_iterable, '_partof': py_partof,
+        '_index': py_index, '_raise': py_raise, '_builtin': call_builtin,
+        '_sin': sin_deg, '_cos': cos_deg, '_tan': tan_deg, '_cotan': cotan_deg,
+        '_macros': set(), '_modules': modules, '_arity': py_arity,
+    }
+    constants = set()
+    def reassign(name, value):
+        if name in constants:
+            raise ValueError(f"Cannot reassign constant '{name}'")
+        return value
+    def declare(name, value):
+        reassign(name, value)
+        constants.add(name)
+        return value
+    def undefine(name):
+        if name not in namespace['_macros']:
+            raise RuntimeError("Macros is not defined")
+        namespace['_macros'].discard(name)
+    def load(modul):
+        if modul in modules:
+            return
+        try:
+            parsed = module_tree(modul)
+        except FileNotFoundError:
+            print(f"Module '{modul}' not found")
+            return
+        if parsed:
+            transpiler = PythonTranspiler()
+            source = transpiler.transpile(parsed)
+            module_namespace = python_runtime(modules, transpiler.nodes)
+            modules[modul] = module_namespace
+            try:
+                exec(compile(source, modul + '.n', 'exec'), module_namespace)
+            except BaseException:
+                modules.pop(modul, None)
+                raise
+    def register(modul):
+        if module_options['lazy'] and modul not in modules:
+            python_deferred.add(modul)
+        else:
+            load(modul)
+    def require(modul):
+        if modul in python_deferred:
+            python_deferred.discard(modul)
+            load(modul)
+    def modcall(modul, func, *args):
+        require(modul)
+        if modul in modules:
+            target = modules[modul].get(python_name(func))
+            if not callable(target):
+                raise NameError(f"Function '{func}' not found in module '{modul}'")
+            return target(*args)
+        return eval_ast(('modfunc', modul, func, [('name', arg) for arg in args]))
+    def modvar(modul, var):
+        require(modul)
+        if modul in modules and python_name(var) in modules[modul]:
+            return modules[modul][python_name(var)]
+        raise NameError(f"Variable '{var}' not found in module '{modul}'")
+    namespace['_undefine'] = undefine
+    namespace['_declare'] = declare
+    namespace['_reassign'] = reassign
+    namespace['_import'] = register
+    namespace['_modcall'] = modcall
+    namespace['_modvar'] = modvar
+    namespace['_fallback'] = lambda index: eval_ast(nodes[index])
+    namespace['_memo'] = py_memo
+    return namespace
+
+def transpile_python(tree):
+    return PythonTranspiler().transpile(tree)
+
+def run_python(tree):
+    transpiler = PythonTranspiler()
+    source = transpiler.transpile(tree)
+    try:
+        exec(compile(source, '<N>', 'exec'), python_runtime(nodes=transpiler.nodes))
+    except ReturnSignal as signal:
+        return signal.value
+
+
+# === Benchmarks ===
+benchmarks = {}
+
+def benchmark(name):
+    def register(func):
+        benchmarks[name] = func
+        return func
+    return register
+
+def time_eval(source, repeat=5):
+    tree = parser.parse(source)
+    best = None
+    for _ in range(repeat):
+        cleanup()
+        start = time.perf_counter()
+        eval_ast(tree)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    cleanup()
+    return best
+
+def statement_cost(source, statements):
+    return f"{time_eval(source) / statements * 1e9:8.0f} ns/stmt"
+
+@benchmark('block')
+def bench_block():
+    return statement_cost("var s = 0\nfor(i, 1, 20000) { if (i > 0) { s = i  s = s + 1  s = s - 1 } }", 20000 * 5)
+
+@benchmark('while')
+def bench_while():
+    return statement_cost("var k = 0\nwhile (k < 20000) { k += 1  if (k < 0) { break } }", 20000 * 3)
+
+@benchmark('foreach')
+def bench_foreach():
+    return statement_cost("var s = 0\nvar text = \"n\" * 20000\nforeach(x partof text) { s = x  if (x == \"\") { continue } }", 20000 * 3)
+
+@benchmark('alwaysDo')
+def bench_always_do():
+    return statement_cost("var k = 0\nforever { k += 1  if (k >= 20000) { break } }", 20000 * 3)
+
+@benchmark('for')
+def bench_for():
+    return statement_cost("var s = 0\nfor(i, 1, 20000) { s = i  if (i < 0) { break } }", 20000 * 3)
+
+lexer_sample = """
+// sample used by the lexer benchmark
+import "math"
+memo func fib(n) { if (n < 2) { return n } return fib(n - 1) + fib(n - 2) }
+var format = "text"  var island = 'land'  var isEmpty = false
+for (index, 0, 10) { format += toStr(index) }
+foreach (item partof [1, 2.5, -3, 4e2]) { if (item >= 2 && item !== 3 || isEmpty) { continue } }
+while (island == "land") { island = null  break }
+var result = (fib(10) > 50) ? true : false
+try { raise "forever" } catch (error) { println(error, result) }
+define twice(a) { a * 2 }
+/* block comment */ println(twice(21) ^ 2 % 7 << 1)
+"""
+
+def token_rate(source, repeat=5):
+    scanner = lexer.clone()
+    best = None
+    count = 0
+    for _ in range(repeat):
+        scanner.input(source)
+        scanner.lineno = 1
+        start = time.perf_counter()
+        count = sum(1 for _ in iter(scanner.token, None))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return f"{count / best:8.0f} tokens/s ({count} tokens, {len(source) // 1024} KiB)"
+
+@benchmark('lexer')
+def bench_lexer():
+    return token_rate(lexer_sample * 2000)
+
+def parse_cost(source, units):
+    start = time.perf_counter()
+    parser.parse(source, lexer=lexer.clone())
+    elapsed = time.perf_counter() - start
+    return f"{units:>7} {elapsed:8.3f}s {elapsed / units * 1e6:7.2f} us/unit"
+
+@benchmark('parse')
+def bench_parse():
+    rows = []
+    for count in (1000, 10000, 100000):
+        rows.append('statements ' + parse_cost("var x = 1\n" * count, count))
+    for count in (1000, 10000, 100000):
+        rows.append('elements   ' + parse_cost("var a = [" + "1, " * count + "1]", count))
+    return '\n             '.join(rows)
+
+def backend_cost(source):
+    start = time.perf_counter()
+    expected = parser.parse(source, lexer=lexer.clone())
+    ply_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = PrattParser(source).program()
+    fast_time = time.perf_counter() - start
+    status = '' if result == expected else '  (trees differ)'
+    return f"ply {ply_time:7.3f}s  pratt {fast_time:7.3f}s  {ply_time / fast_time:5.1f}x{status}"
+
+@benchmark('pratt')
+def bench_pratt():
+    rows = ['sample     ' + backend_cost(lexer_sample * 300)]
+    rows.append('statements ' + backend_cost("var x = 1\n" * 100000))
+    rows.append('elements   ' + backend_cost("var a = [" + "1, " * 100000 + "1]"))
+    return '\n             '.join(rows)
+
+def run_benchmarks(names=None):
+    for name, func in benchmarks.items():
+        if names and name not in names:
+            continue
+        print(f"{name:<12} {func()}")
+
+
+# === Engine Check ===
+# Every engine must print what eval_ast prints and fail where it fails.
+engine_corpus = [
+    "var max = 3\nprintln(max)",
+    "func add(a, b) {\n    return a + b\n}\nprintln(add)",
+    "func add(a, b) {\n    return a + b\n}\nvar g = add\nprintln(g(1, 2))",
+    "func f(len) {\n    return len\n}\nprintln(f(2))",
+    "var a = [1, 2, 3]\nprintln(a[1])",
+    "var n = 4\nn += 1\nprintln(n)",
+    "var x = 1\nif (x == 1) {\n    var x = 2\n}\nprintln(x)",
+    "const k = 1\nk = 2",
+    "func fact(n) {\n    return n < 2 ? 1 : n * fact(n - 1)\n}\nprintln(fact(10))",
+    "var s = 0\nfor (i, 1, 10) {\n    s += i\n}\nprintln(s)",
+    "var t = 0\nforeach (x partof [1, 2, 3]) {\n    if (x == 2) {\n        continue\n    }\n    t += x\n}\nprintln(t)",
+    "try {\n    raise \"boom\"\n} catch (e) {\n    println(e)\n}",
+    "define twice(a) { a * 2 }\nprintln(twice(21))",
+    "memo func fib(n) {\n    if (n < 2) {\n        return n\n    }\n    return fib(n - 1) + fib(n - 2)\n}\nprintln(fib(30))",
+    "var f = lambda (a, b) { return a + b }\nprintln(f(2, 3))",
+]
+
+engine_runners = {
+    'closure': lambda tree: run_closure(tree),
+    'vm': lambda tree: run_vm(compile_bytecode(tree)),
+    'resolve': lambda tree: run_resolved(tree),
+    'python': lambda tree: run_python(tree),
+}
+
+def run_isolated(run, source, symbols):
+    import io
+    import contextlib
+    out = io.StringIO()
+    stdin, sys.stdin = sys.stdin, io.StringIO()
+    failed = False
+    try:
+        with contextlib.redirect_stdout(out):
+            try:
+                lexer.lineno = 1
+                run(parser.parse(source))
+            except (Exception, SystemExit):
+                failed = True
+    finally:
+        sys.stdin = stdin
+        modules.clear()
+        module_state.clear()
+        module_files.clear()
+        python_modules.clear()
+        cleanup()
+        vars.clear()
+        scope_stack[:] = [{}]
+        symbol_table.clear()
+        symbol_table.update(symbols)
+    return out.getvalue(), failed
+
+def check_engines(paths=()):
+    sources = list(engine_corpus)
+    if not paths:
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths = sorted(os.path.join(here, name) for name in os.listdir(here) if name.endswith('.n'))
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            sources.append(f.read())
+    symbols = dict(symbol_table)
+    agreed = mismatches = 0
+    for source in sources:
+        expected = run_isolated(eval_ast, source, symbols)
+        for name, run in engine_runners.items():
+            result = run_isolated(run, source, symbols)
+            if result != expected:
+                mismatches += 1
+                print(f"engines disagree on:\n{source}\n  eval_ast: {expected}\n  {name}: {result}\n")
+            else:
+                agreed += 1
+    print(f"{len(sources)} sources x {len(engine_runners)} engines: {agreed} identical, {mismatches} mismatches")
+    return mismatches
+
+
+# === Daemon ===
+# A warm master preloads modules and forks one-shot workers. Each worker
+# serves a single job with the client's stdin/stdout/stderr (passed over
+# the socket) and exits, so every script starts from the master's state.
+def daemon_socket_dir():
+    return os.environ.get('XDG_RUNTIME_DIR') or os.path.join(os.environ.get('TMPDIR', '/tmp'), f"n-{os.getuid()}")
+
+def daemon_socket_path():
+    return os.environ.get('N_SOCKET') or os.path.join(daemon_socket_dir(), 'n-daemon.sock')
+
+def private_dir(directory):
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    info = os.lstat(directory)
+    return info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+def peer_uid(conn):
+    import socket
+    import struct
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+def option_value(options, name, default):
+    for option in options:
+        if option.startswith(name + '='):
+            return option[len(name) + 1:]
+    return default
+
+def recv_frame(conn, max_fds=0):
+    import socket
+    data, fds, _, _ = socket.recv_fds(conn, 65536, max_fds)
+    if len(data) < 4:
+        return None, fds
+    size = int.from_bytes(data[:4], 'big')
+    data = data[4:]
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None, fds
+        data += chunk
+    return data, fds
+
+def exit_status(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+def serve_job(conn):
+    uid = peer_uid(conn)
+    if uid is not None and uid != os.getuid():
+        return
+    data, fds = recv_frame(conn, 3)
+    if data is None or len(fds) != 3:
+        return
+    cwd, *argv = [os.fsdecode(part) for part in data.split(b'\0')]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    try:
+        os.chdir(cwd)
+        status = main(argv)
+    except SystemExit as e:
+        status = exit_status(e.code)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        status = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(bytes([status & 0xFF]))
+
+def serve(options):
+    import signal
+    import socket
+    path = option_value(options, '--socket', os.environ.get('N_SOCKET'))
+    if path is None:
+        path = daemon_socket_path()
+        if not private_dir(os.path.dirname(path)):
+            print(f"N: {os.path.dirname(path)} is not a private directory", file=sys.stderr)
+            return 2
+    workers = int(option_value(options, '--workers', '4'))
+    for modul in filter(None, option_value(options, '--preload', '').split(',')):
+        try:
+            import_module(modul)
+        except FileNotFoundError:
+            print(f"Module '{modul}' not found")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if os.path.exists(path):
+        try:
+            server.connect(path)
+        except OSError:
+            os.unlink(path)
+        else:
+            print(f"N: a daemon is already listening on {path}", file=sys.stderr)
+            return 2
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(128)
+    children = set()
+    def spawn():
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                conn, _ = server.accept()
+                server.close()
+                with conn:
+                    serve_job(conn)
+            finally:
+                os._exit(0)
+        children.add(pid)
+    def stop(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"N daemon listening on {path} with {workers} workers", file=sys.stderr)
+    try:
+        while True:
+            pid, _ = os.wait()
+            if pid in children:
+                children.discard(pid)
+                spawn()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+
 # === Test Run ===
 def cleanup():
     funcs.clear()
     rvars.clear()
-    mod_vars.clear()
-    mod_funcs.clear()
-    vars_stack.clear()
     consts.clear()
     varCache.clear()
-
-while True:
-    cleanup()
-    if '--version' in sys.argv:
-            print(f'Standard N-lang Interpreter: {version}')
-            print(f"Python version:", sys.version[:6])
-            print(f"PLY version: {ply.__version__}")
+    macro_templates.clear()
+    function_frames.clear()
+    memo_tables.clear()
+    loop_signals.clear()
+    closure_bodies.clear()
+    vm_chunks.clear()
+    deferred_modules.clear()
+    python_deferred.clear()
+    for modul in bundled_modules:
+        modules.pop(modul, None)
+        module_state.pop(modul, None)
+        python_modules.pop(modul, None)
+    bundled_modules.clear()
+    call_sites.clear()
+    call_site_nodes.clear()
+    drop_stale_modules()
+    restore_module_state()
+
+startup_mark('interpreter')
+
+def apply_options(options):
+    if '--pratt' in options:
+        parser_options['backend'] = 'pratt'
+    if '--no-ast-cache' in options:
+        ast_cache['enabled'] = False
+    if '--lazy-imports' in options:
+        module_options['lazy'] = True
+
+def run_program(result, options):
+    if result is not None and '--dump-ast' in options:
+        pprint.pprint(result)
+    if '--startup-profile' in options:
+        print_startup_profile()
+    if result is None:
+        print("Parsing failed due to syntax error")
+        return False
+    if '--resolve' in options:
+        run_resolved(result)
+    elif '--closure' in options:
+        run_closure(result)
+    elif '--emit-python' in options:
+        sys.stdout.write(transpile_python(result))
+    elif '--python' in options:
+        run_python(result)
+    elif '--vm' in options:
+        chunk = compile_bytecode(result)
+        if '--dis' in options:
+            disassemble_chunk(chunk)
+        run_vm(chunk)
+    else:
+        eval_ast(result)
+    if '--stats' in options:
+        print_runtime_stats()
+    return True
+
+def load_script(path, options):
+    if path.endswith('.nb'):
+        result = load_bundle(path)
+    else:
+        result = load_program(path, '-O' in options)
+    startup_mark('load')
+    return result
+
+def parse_script(code, options):
+    result = parse_source(code)
+    startup_mark('parse')
+    if result is not None and '-O' in options:
+        result = optimize_ast(result, funcs)
+        startup_mark('optimize')
+    return result
+
+def repl(options):
+    while True:
+        cleanup()
+        try:
+            code = input("N: ")
+            startup_mark('input')
+            if code.startswith("bundle "):
+                build_bundle(*code[7:].split())
+                continue
+            if code.startswith("run "):
+                result = load_script(code[4:].strip(), options)
+            else:
+                result = parse_script(code, options)
+            run_program(result, options)
+            cleanup()
+        except KeyboardInterrupt:
+            print("\nExiting...")
             break
+        except EOFError:
+            print()
+            break
+        except Exception as e:
+            print(f"Error: {e}(line {lexer.lineno})")
+
+def run_script(path, code, options):
+    syntax_errors['count'] = 0
     try:
-        code = input("N: ")
-        lines = code.split('\n')
-        if '--version' in sys.argv:
-            print(f'Standard N-lang Interpreter: {version}')
-            print(f"Python version:", sys.version[:6])
-        if code.startswith("run "):
-            filename = code[4:].strip()
-            with open(filename, "r", encoding='utf-8') as f:
-                code = f.read()
-                lines = code.split('\n')
-        result = parser.parse(code)
-        if result is None:
-            print("Parsing failed due to syntax error")
+        if code is None:
+            result = load_script(path, options)
         else:
-            eval_ast(result)
-        cleanup()
+            result = parse_script(code, options)
+    except (OSError, ValueError) as e:
+        print(f"N: {e}", file=sys.stderr)
+        return 2
+    if syntax_errors['count']:
+        result = None
+    try:
+        if not run_program(result, options):
+            return 2
     except KeyboardInterrupt:
-        print("\nExiting...")
-        break
+        return 130
     except Exception as e:
-        print(f"Error: {e}(line {lexer.lineno})")
\ No newline at end of file
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+def parse_command_line(argv):
+    options = []
+    for i, arg in enumerate(argv):
+        if arg in ('--bench', '--parser-check', '--engine-check'):
+            return options + argv[i:], None, []
+        if arg == '-c':
+            return options, ('-c', argv[i + 1] if i + 1 < len(argv) else None), argv[i + 2:]
+        if arg == '-' or not arg.startswith('-'):
+            return options, (arg, None), argv[i + 1:]
+        options.append(arg)
+    return options, None, []
+
+def main(argv):
+    options, program, arguments = parse_command_line(argv)
+    apply_options(options)
+    if '--build-tables' in options:
+        build_tables()
+        return 0
+    if '--version' in options:
+        print(f'Standard N-lang Interpreter: {version}')
+        print(f"Python version:", sys.version[:6])
+        print(f"PLY version: {ply.__version__}")
+        return 0
+    if '--bench' in options:
+        run_benchmarks([arg for arg in options[options.index('--bench') + 1:] if not arg.startswith('-')])
+        return 0
+    if '--parser-check' in options:
+        return 1 if check_parsers([arg for arg in options[options.index('--parser-check') + 1:] if not arg.startswith('-')]) else 0
+    if '--engine-check' in options:
+        return 1 if check_engines([arg for arg in options[options.index('--engine-check') + 1:] if not arg.startswith('-')]) else 0
+    if '--serve' in options:
+        return serve(options)
+    if program is None:
+        repl(options)
+        return 0
+    path, code = program
+    script_args[:] = [path] + arguments
+    cleanup()
+    if path == '-c':
+        if code is None:
+            print("N: option -c requires an argument", file=sys.stderr)
+            return 2
+        return run_script(None, code, options)
+    if path == '-':
+        return run_script(None, sys.stdin.read(), options)
+    return run_script(path, None, options)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
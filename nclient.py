@@ -0,0 +1,61 @@
+import os
+import socket
+import stat
+import struct
+import sys
+
+# Thin client for `python N.py --serve`: forwards argv, the working directory
+# and its own stdin/stdout/stderr to a warm worker and exits with the script's
+# status. Falls back to running N.py directly when no daemon is listening.
+
+def daemon_socket_dir():
+    return os.environ.get('XDG_RUNTIME_DIR') or os.path.join(os.environ.get('TMPDIR', '/tmp'), f"n-{os.getuid()}")
+
+def daemon_socket_path():
+    return os.environ.get('N_SOCKET') or os.path.join(daemon_socket_dir(), 'n-daemon.sock')
+
+def trusted_socket(path):
+    info = os.stat(path)
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+def peer_uid(conn):
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+def run_directly(argv):
+    interpreter = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'N.py')
+    os.execv(sys.executable, [sys.executable, interpreter] + argv)
+
+def main(argv):
+    path = daemon_socket_path()
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        if not trusted_socket(path):
+            print(f"nclient: ignoring {path}: not a private socket owned by you", file=sys.stderr)
+            run_directly(argv)
+        conn.connect(path)
+    except OSError:
+        run_directly(argv)
+    uid = peer_uid(conn)
+    if uid is not None and uid != os.getuid():
+        print(f"nclient: ignoring {path}: the daemon runs as uid {uid}", file=sys.stderr)
+        conn.close()
+        run_directly(argv)
+    request = b'\0'.join(os.fsencode(part) for part in [os.getcwd()] + argv)
+    frame = len(request).to_bytes(4, 'big') + request
+    sent = socket.send_fds(conn, [frame], [0, 1, 2])
+    if sent < len(frame):
+        conn.sendall(frame[sent:])
+    reply = conn.recv(1)
+    if not reply:
+        print("nclient: the N daemon closed the connection", file=sys.stderr)
+        return 1
+    return reply[0]
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,10 @@
+# n_lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('AND', 'ASYNC', 'AWAIT', 'BREAK', 'CATCH', 'COMMA', 'CONST', 'CONTINUE', 'DEFINE', 'DIVIDE', 'DOT', 'EE', 'ELSE', 'ENDIF', 'EQ', 'FALSE', 'FOR', 'FOREACH', 'FOREVER', 'FUNC', 'GT', 'GTE', 'ID', 'IF', 'IFDEF', 'IFNDEF', 'IMPORT', 'IN', 'IS', 'LAMBDA', 'LBRACK', 'LBRACKET', 'LPAREN', 'LT', 'LTE', 'MEMO', 'MINUS', 'MOD', 'MULTIPLE', 'NEQ', 'NULL', 'NUMBER', 'OR', 'OTHERWISE', 'PASS', 'PLUS', 'POW', 'QUE', 'RAISE', 'RBRACK', 'RBRACKET', 'RETURN', 'RPAREN', 'SEMI', 'SHIFT', 'STRING', 'TRUE', 'TRY', 'TWODOTS', 'UNDEF', 'VAR', 'WHILE', 'YIELD', 'op', 'readonly'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_op>\\+\\=|-\\=|\\*\\=|\\/\\=|\\^\\=)|(?P<t_SHIFT>\\>\\>|\\<\\<)|(?P<t_AND>&&)|(?P<t_OR>\\|\\|)|(?P<t_ID>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<t_NUMBER>-?\\d*\\.?\\d+(?:[eE][+-]?\\d+)?)|(?P<t_STRING>"[^"]*"|\\\'[^\\\']*\\\')|(?P<t_COMMENT>\\/\\/[^\\n]*)|(?P<t_COMMENT_LONG>/\\*([^*]|\\*+[^*/])*\\*/)|(?P<t_newline>\\n+)|(?P<t_NEQ>!==)|(?P<t_DOT>\\.)|(?P<t_EE>==)|(?P<t_GTE>>=)|(?P<t_LBRACK>\\[)|(?P<t_LBRACKET>\\{)|(?P<t_LPAREN>\\()|(?P<t_LTE><=)|(?P<t_MOD>\\%)|(?P<t_MULTIPLE>\\*)|(?P<t_PLUS>\\+)|(?P<t_POW>\\^)|(?P<t_QUE>\\?)|(?P<t_RBRACK>\\])|(?P<t_RBRACKET>\\})|(?P<t_RPAREN>\\))|(?P<t_SEMI>\\;)|(?P<t_TWODOTS>\\:)|(?P<t_COMMA>,)|(?P<t_DIVIDE>/)|(?P<t_EQ>=)|(?P<t_GT>>)|(?P<t_LT><)|(?P<t_MINUS>-)', [None, ('t_op', 'op'), ('t_SHIFT', 'SHIFT'), ('t_AND', 'AND'), ('t_OR', 'OR'), ('t_ID', 'ID'), ('t_NUMBER', 'NUMBER'), ('t_STRING', 'STRING'), ('t_COMMENT', 'COMMENT'), ('t_COMMENT_LONG', 'COMMENT_LONG'), None, ('t_newline', 'newline'), (None, 'NEQ'), (None, 'DOT'), (None, 'EE'), (None, 'GTE'), (None, 'LBRACK'), (None, 'LBRACKET'), (None, 'LPAREN'), (None, 'LTE'), (None, 'MOD'), (None, 'MULTIPLE'), (None, 'PLUS'), (None, 'POW'), (None, 'QUE'), (None, 'RBRACK'), (None, 'RBRACKET'), (None, 'RPAREN'), (None, 'SEMI'), (None, 'TWODOTS'), (None, 'COMMA'), (None, 'DIVIDE'), (None, 'EQ'), (None, 'GT'), (None, 'LT'), (None, 'MINUS')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}